@@ -1,14 +1,13 @@
-# from gevent.pywsgi import WSGIServer
-# from geventwebsocket.handler import WebSocketHandler
-
-# monkey.patch_all()
 from dotenv import load_dotenv
 
 import os
 if os.getenv("SERVER_MODE") == "PRODUCTION":
     load_dotenv()
 
-from flask import Flask, jsonify
+from utils.log_config import setup_logging
+setup_logging()
+
+from flask import Flask, jsonify, request, g
 from flask_socketio import SocketIO
 from flask_cors import CORS
 from flask_limiter import Limiter, RateLimitExceeded
@@ -20,28 +19,44 @@ from discord_bot import run_bot
 
 from utils.exceptions import (
     HandledApiException,
-    CriticalAPIException
-    
+    CriticalAPIException,
+    format_validation_errors
 )
 from utils.helper import send_error_log
+from utils.error_reporter import PRIORITY_HIGH, PRIORITY_LOW
+from utils.json_provider import OrjsonProvider
+from utils.wsgi_server import create_server
+from utils.metrics import observe_request
 
-from routes.messages import bp_messages
+from routes.messages import bp_messages, is_history_page_request, HISTORY_PAGE_LIMIT
 from routes.tickets import bp_tickets, ticket_limiter
 from routes.auth import auth_bp
+from routes.metrics import bp_metrics
 
 
+from database.indexes import ensure_indexes
+from modules.delivery import delivery_pool
+
 from socket_manager.handler import SocketHandler
 from socket_manager.send_events import socket_sio_init
 from discord.errors import DiscordException
 
-import json
 import traceback
+import logging
+import time
+
+logger = logging.getLogger("api")
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 CORS(app, resources={r"/*": {"origins": "*"}}, cors_allowed_origins="*")
 
-sio = SocketIO(app, cors_allowed_origins="*")
+# PRODUCTION deployments can run one bot process and many web workers, emits from any
+# process then reach every client through the message queue (e.g. redis://localhost:6379/0)
+SERVER_ROLE = os.getenv("SERVER_ROLE", "all").lower()
+# Plain threads, the bot's asyncio loop runs in one of them so nothing may be monkey patched
+sio = SocketIO(app, cors_allowed_origins="*", async_mode="threading", message_queue=os.getenv("SOCKETIO_MESSAGE_QUEUE"))
 
 
 
@@ -56,7 +71,9 @@ def initialize_limiter():
     limiter.init_app(app)
     ticket_limiter.init_app(app)
     
-    limiter.limit("10 per minute")(bp_messages)
+    limiter.limit("10 per minute", exempt_when=is_history_page_request)(bp_messages)
+    limiter.limit(HISTORY_PAGE_LIMIT, exempt_when=lambda: not is_history_page_request())(bp_messages)
+    limiter.exempt(bp_metrics)
 
 
 
@@ -68,6 +85,7 @@ def register_blueprints():
     app.register_blueprint(bp_tickets)
     app.register_blueprint(bp_messages)
     app.register_blueprint(auth_bp)
+    app.register_blueprint(bp_metrics)
 
 
 
@@ -76,13 +94,28 @@ register_blueprints()
 initialize_limiter()
 
 
+# ===================== Request Metrics =====================
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        observe_request(request.method, route, response.status_code, time.perf_counter() - started)
+    return response
+
+
 # Socker Handler
 # ===================== SocketIO Handlers =====================
 @sio.on_error_default
 def error_handler(e):
     traceback_details = traceback.format_exc()
     
-    send_error_log("Socket Unhandled Error", traceback_details, e)
+    send_error_log("Socket Unhandled Error", traceback_details, e, priority=PRIORITY_LOW)
 # ===================== User Error Handlers =====================
 @app.errorhandler(RateLimitExceeded)
 def handle_rate_limit_exceeded(e: RateLimitExceeded):
@@ -97,21 +130,8 @@ def handle_handled_api_exception(e: HandledApiException):
 
 @app.errorhandler(ValidationError)
 def validation_error(e: ValidationError):
-    print(e.title)
-    errors = []
-    
-    error_list = json.loads(e.json(include_url=False))
-
-    for error in error_list:
-        data = {
-            "location": '.'.join(map(str, error['loc'])), 
-            "message": error['msg'],
-            "type": error['type'],
-        }
-        if "ctx" in error:
-            data['context'] = error['ctx']
-
-        errors.append(data)
+    logger.debug("Validation failed for %s", e.title)
+    errors = format_validation_errors(e)
 
     return jsonify({"error": "BAD_REQUEST", "message": "Invalid form of body", "errors": errors}), 400
  
@@ -121,17 +141,15 @@ def validation_error(e: ValidationError):
 def handle_critical_api_exception(e: CriticalAPIException):
     # Log the error
     traceback_details = e.get_traceback()
-    print(traceback_details)
-    send_error_log("Critical API Exception", traceback_details, e)
+    logger.error("Critical API exception", extra={"traceback": traceback_details})
+    send_error_log("Critical API Exception", traceback_details, e, priority=PRIORITY_HIGH)
     return e.to_response()
 
 @app.errorhandler(DiscordException)
 def handle_discord_exception(e: DiscordException):
     # Log the error
     trackback_details = traceback.format_exc()
-    print("=====================Discord Exception=====================\n")
-    print(trackback_details)
-    print("\n===========================================================")
+    logger.error("Discord exception", extra={"traceback": trackback_details})
     
     send_error_log("Discord Exception", trackback_details, e)
     
@@ -142,7 +160,7 @@ def handle_discord_exception(e: DiscordException):
 def handle_unhandled_exception(e: Exception):
     traceback_details = traceback.format_exc()
     
-    send_error_log("Unhandled Exception", traceback_details, e)
+    send_error_log("Unhandled Exception", traceback_details, e, priority=PRIORITY_HIGH)
     return jsonify({"message": "An error occurred",}), 500
 
  
@@ -155,13 +173,15 @@ def run_app():
     
         
     if os.getenv("SERVER_MODE") == "PRODUCTION":
-        print("Running in production mode")
-        # http_server = WSGIServer(('0.0.0.0', int(PORT)), app, handler_class=WebSocketHandler)
-        # http_server.serve_forever()
-        sio.run(app, host='0.0.0.0', port=5000)
+        logger.info("Running in production mode", extra={"port": int(PORT)})
+        server = create_server(app, host='0.0.0.0', port=int(PORT))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
 
     else:
-        print("Running in development mode")
+        logger.info("Running in development mode", extra={"port": int(PORT)})
         app.run(host='0.0.0.0', port=PORT, debug=False)
 
 
@@ -169,5 +189,8 @@ def run_app():
 
 
 if __name__ == "__main__":
-    run_bot()
+    ensure_indexes()
+    if SERVER_ROLE != "web":
+        run_bot()
+    delivery_pool.start()
     run_app()
@@ -0,0 +1,174 @@
+from dotenv import load_dotenv
+
+import os
+if os.getenv("SERVER_MODE") == "PRODUCTION":
+    load_dotenv()
+
+from utils.log_config import setup_logging
+setup_logging()
+
+from quart import Quart, Response, jsonify, request, g
+from pydantic import ValidationError
+
+from utils.exceptions import (
+    HandledApiException,
+    CriticalAPIException,
+    format_validation_errors
+)
+from utils.helper import send_error_log
+from utils.error_reporter import PRIORITY_HIGH
+from utils.json_provider import OrjsonProvider
+from utils.metrics import observe_request, render_metrics
+
+from routes.async_messages import bp_messages
+from routes.async_tickets import bp_tickets
+from routes.async_auth import auth_bp
+
+from modules.async_decorator import check_rate_limit
+from database.indexes import ensure_indexes
+from database.async_messages import message_write_buffer
+from modules.delivery import delivery_pool
+
+from discord_bot.app import bot, start_bot_async
+from socket_manager.async_handler import AsyncSocketHandler
+from socket_manager.emitter import socket_emitter
+from socket_manager.replay_buffer import replay_buffer
+from socket_manager.session_store import emitter_session_store
+from discord.errors import DiscordException
+
+import traceback
+import logging
+import time
+import asyncio
+import socketio
+import uvicorn
+
+
+# Single event loop mode: Quart, Socket.IO, the Discord bot and the async Mongo client all
+# share py-cord's loop, so routes await the bot and the database without thread hops.
+#
+#   python asgi_app.py
+
+SERVER_ROLE = os.getenv("SERVER_ROLE", "all").lower()
+
+logger = logging.getLogger("api")
+
+app = Quart(__name__)
+app.json = OrjsonProvider(app)
+
+message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=socketio.AsyncRedisManager(message_queue) if message_queue else None
+)
+sio.register_namespace(AsyncSocketHandler("/"))
+
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=app)
+
+app.register_blueprint(bp_tickets)
+app.register_blueprint(bp_messages)
+app.register_blueprint(auth_bp)
+
+
+async def request_info() -> dict:
+    return {
+        "path": request.path,
+        "method": request.method,
+        "args": request.args.to_dict(),
+        "body": await request.get_data(as_text=True),
+        "remote_addr": request.remote_addr,
+        "user_agent": request.headers.get("User-Agent"),
+    }
+
+
+@app.before_serving
+async def startup():
+    await asyncio.to_thread(ensure_indexes)
+    if SERVER_ROLE != "web":
+        await start_bot_async()
+    socket_emitter.start_async(sio, replay_buffer, emitter_session_store())
+    delivery_pool.start()
+
+
+@app.after_serving
+async def shutdown():
+    if not bot.is_closed():
+        await bot.close()
+    else:
+        await message_write_buffer.close()
+
+
+@app.before_request
+async def default_rate_limit():
+    g.request_started = time.perf_counter()
+    if request.path != "/metrics":
+        await check_rate_limit("100 per minute", "default")
+
+
+@app.after_request
+async def add_cors_headers(response):
+    response.headers["Access-Control-Allow-Origin"] = "*"
+    response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type"
+
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        observe_request(request.method, route, response.status_code, time.perf_counter() - started)
+    return response
+
+
+@app.route("/metrics", methods=["GET"])
+async def metrics():
+    # Gauges such as the Redis session count are read while rendering
+    body, content_type = await asyncio.to_thread(render_metrics, request.headers.get("Authorization"))
+    return Response(body, status=200, content_type=content_type)
+
+
+# ===================== User Error Handlers =====================
+@app.errorhandler(HandledApiException)
+async def handle_handled_api_exception(e: HandledApiException):
+    return jsonify(e.to_dict()), e.status_code, e.headers()
+
+
+@app.errorhandler(ValidationError)
+async def validation_error(e: ValidationError):
+    return jsonify({"error": "BAD_REQUEST", "message": "Invalid form of body", "errors": format_validation_errors(e)}), 400
+
+
+# ===================== Critical Error Handlers =====================
+@app.errorhandler(CriticalAPIException)
+async def handle_critical_api_exception(e: CriticalAPIException):
+    traceback_details = e.get_traceback()
+    logger.error("Critical API exception", extra={"traceback": traceback_details})
+    send_error_log(
+        "Critical API Exception", traceback_details, e, request_info=await request_info(), priority=PRIORITY_HIGH
+    )
+    return jsonify(e.to_dict()), e.status_code
+
+
+@app.errorhandler(DiscordException)
+async def handle_discord_exception(e: DiscordException):
+    trackback_details = traceback.format_exc()
+    logger.error("Discord exception", extra={"traceback": trackback_details})
+
+    send_error_log("Discord Exception", trackback_details, e, request_info=await request_info())
+
+    return jsonify({"error": "INTERNAL_SERVER_ERROR", "message": "An error occurred while trying to interact with discord"}), 500
+
+
+def run_asgi_app():
+    PORT = os.getenv("WEB_SERVER_PORT")
+    if PORT is None:
+        raise ValueError("WEB_SERVER_PORT is not set in the environment variables")
+
+    # `loop="none"` keeps uvicorn from creating its own loop, the server runs on the bot's
+    config = uvicorn.Config(asgi_app, host="0.0.0.0", port=int(PORT), loop="none", lifespan="on")
+    server = uvicorn.Server(config)
+
+    asyncio.set_event_loop(bot.loop)
+    bot.loop.run_until_complete(server.serve())
+
+
+if __name__ == "__main__":
+    run_asgi_app()
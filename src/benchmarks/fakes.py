@@ -0,0 +1,268 @@
+"""
+Stand-ins for Discord used by the load test and simulator benchmarks.
+
+`configure_environment` has to run before any module of the app is imported, the data
+layer, settings and authenticator read their configuration at import time.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from collections import Counter
+
+import threading
+import time
+import os
+
+
+def configure_environment(db_name: str = "ticket_loadtest") -> None:
+    """
+    Points the app at a local MongoDB (`MONGO_URI`, default `mongodb://localhost:27017`)
+    and a throwaway database, and fills in the Discord ids the settings require.
+    Values already set in the environment are kept.
+    """
+    defaults = {
+        "MONGO_URI": "mongodb://localhost:27017",
+        "DB_NAME": db_name,
+        "JWT_SECRET_KEY": "loadtest-secret",
+        "ADMIN_ROLE_ID": "1",
+        "MANAGER_ROLE_ID": "2",
+        "DEVELOPER_ROLE_ID": "3",
+        "SUPPORT_TEAM_ROLE_ID": "4",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+GUILD_SETTINGS = {
+    "id": "guild_settings",
+    "replay_to_success_message": False,
+    "ticket_opening_categories": [1],
+    "ticket_closing_categories": [2],
+}
+
+
+def reset_database() -> None:
+    """
+    Drops the benchmark database and seeds the guild settings document `GuildSettings` loads.
+    """
+    from pymongo import MongoClient
+
+    client = MongoClient(os.environ["MONGO_URI"])
+    client.drop_database(os.environ["DB_NAME"])
+    client[os.environ["DB_NAME"]]["settings"].insert_one(dict(GUILD_SETTINGS))
+    client.close()
+
+
+class FakeDiscordHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            self.server.requests += 1
+
+        self.send_response(204)
+        self.send_header("Content-Length", "0")
+        # Never exhausted, the benchmark measures the app and not Discord's limits
+        self.send_header("X-RateLimit-Remaining", "5")
+        self.send_header("X-RateLimit-Reset-After", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeDiscordServer(ThreadingHTTPServer):
+    """
+    Answers webhook executions with 204 after `latency` seconds, like Discord without `wait=true`.
+    """
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), FakeDiscordHandler)
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def start(self) -> "FakeDiscordServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def webhook_url(self, channel_id: str) -> str:
+        # One webhook per channel, like real tickets, so rate limit buckets are not shared
+        return f"http://127.0.0.1:{self.server_port}/api/webhooks/{channel_id}/loadtest"
+
+
+async def _reply(*args, **kwargs):
+    return None
+
+
+def fake_discord_message(
+    message_id: int,
+    channel_id: str,
+    content: str,
+    author_id: int = 900000000000000000,
+    author_name: str = "support-agent",
+    bot: bool = False
+):
+    """
+    The attributes of `discord.Message` the message handler cog reads.
+    """
+    author = SimpleNamespace(id=author_id, name=author_name, display_name=author_name, bot=bot)
+    return SimpleNamespace(
+        id=message_id,
+        channel=SimpleNamespace(id=int(channel_id)),
+        author=author,
+        content=content,
+        mentions=[],
+        attachments=[],
+        reply=_reply,
+    )
+
+
+class InMemoryCollection:
+    """
+    The part of a pymongo collection the message handler cog and the settings use:
+    lookups by top level equality or `$ne`, `$set`, `$inc` and `$pull` updates, the
+    pipeline updates of the message versions and inserts.
+    Every call is counted in `ops` by method name.
+    """
+    def __init__(self, ops: Counter) -> None:
+        self.ops = ops
+        self.documents: list[dict] = []
+
+    def _match(self, query: dict) -> dict:
+        def matches(document: dict, key: str, value) -> bool:
+            if isinstance(value, dict) and "$ne" in value:
+                return document.get(key) != value["$ne"]
+            return document.get(key) == value
+
+        for document in self.documents:
+            if all(matches(document, key, value) for key, value in query.items()):
+                return document
+        return None
+
+    def _evaluate(self, document: dict, expression):
+        """The aggregation expressions used by `reserve_versions_update`."""
+        if isinstance(expression, str) and expression.startswith("$"):
+            # `$field`, or `$$this.field` inside `$filter` which puts the item under `$this`
+            value = document
+            for field in expression[1:].split("."):
+                value = value.get(field) if isinstance(value, dict) else None
+            return value
+        if isinstance(expression, list):
+            return [self._evaluate(document, item) for item in expression]
+        if not isinstance(expression, dict):
+            return expression
+
+        if len(expression) == 1:
+            operator, arguments = next(iter(expression.items()))
+            if operator == "$ifNull":
+                value = self._evaluate(document, arguments[0])
+                return self._evaluate(document, arguments[1]) if value is None else value
+            if operator == "$add":
+                return sum(self._evaluate(document, arguments))
+            if operator == "$subtract":
+                left, right = self._evaluate(document, arguments)
+                return left - right
+            if operator == "$gt":
+                left, right = self._evaluate(document, arguments)
+                return left > right
+            if operator == "$filter":
+                return [
+                    item for item in self._evaluate(document, arguments["input"])
+                    if self._evaluate({**document, "$this": item}, arguments["cond"])
+                ]
+            if operator == "$concatArrays":
+                return [item for array in self._evaluate(document, arguments) for item in array]
+        return {key: self._evaluate(document, value) for key, value in expression.items()}
+
+    def _update(self, document: dict, update) -> None:
+        if isinstance(update, list):
+            for stage in update:
+                document.update({key: self._evaluate(document, value) for key, value in stage["$set"].items()})
+            return
+
+        document.update(update.get("$set", {}))
+        for key, condition in update.get("$pull", {}).items():
+            document[key] = [
+                item for item in document.get(key, [])
+                if not all(item.get(field) == value for field, value in condition.items())
+            ]
+        for key, amount in update.get("$inc", {}).items():
+            document[key] = document.get(key, 0) + amount
+
+    def find_one(self, query: dict, *args, **kwargs) -> dict:
+        self.ops["find_one"] += 1
+        document = self._match(query)
+        return dict(document) if document else None
+
+    def insert_one(self, document: dict) -> None:
+        self.ops["insert_one"] += 1
+        self.documents.append(dict(document))
+
+    def insert_many(self, documents: list, ordered: bool = True) -> None:
+        self.ops["insert_many"] += 1
+        self.documents.extend(dict(document) for document in documents)
+
+    def update_one(self, query: dict, update: dict) -> None:
+        self.ops["update_one"] += 1
+        document = self._match(query)
+        if document:
+            self._update(document, update)
+
+    def find_one_and_update(self, query: dict, update: dict, upsert: bool = False, return_document: bool = False) -> dict:
+        self.ops["find_one_and_update"] += 1
+        document = self._match(query)
+        if not document:
+            if not upsert:
+                return None
+            document = dict(query)
+            self.documents.append(document)
+
+        before = dict(document)
+        self._update(document, update)
+        return dict(document) if return_document else before
+
+
+class AsyncInMemoryCollection:
+    """Awaitable facade over `InMemoryCollection`, standing in for an `AsyncCollection`."""
+    def __init__(self, collection: InMemoryCollection) -> None:
+        self.collection = collection
+
+    def __getattr__(self, name: str):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class InMemoryDatabase:
+    """
+    Collections created on first access. `sync` and `async_` views share the same data,
+    assign them to `mongo_connection.database` and `async_mongo_connection.database`.
+    """
+    def __init__(self) -> None:
+        self.ops = Counter()
+        self.collections: dict[str, InMemoryCollection] = {}
+        self.sync = _DatabaseView(self, asynchronous=False)
+        self.async_ = _DatabaseView(self, asynchronous=True)
+
+    def collection(self, name: str) -> InMemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(self.ops)
+        return self.collections[name]
+
+
+class _DatabaseView:
+    def __init__(self, database: InMemoryDatabase, asynchronous: bool) -> None:
+        self.database = database
+        self.asynchronous = asynchronous
+
+    def __getitem__(self, name: str):
+        collection = self.database.collection(name)
+        return AsyncInMemoryCollection(collection) if self.asynchronous else collection
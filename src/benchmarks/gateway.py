@@ -0,0 +1,295 @@
+"""
+Replays Discord gateway message events into the `MessageHandler` cog.
+
+    python -m benchmarks.gateway [--rate 200] [--duration 10] [--events recorded.jsonl]
+                                 [--mongo] [--save events.jsonl] [--output result.json]
+
+Events are dispatched as their own task on the loop, the way the gateway dispatches
+listeners, at their recorded offsets. Synthetic events are created messages mixed with
+`--edits` and `--deletes` of earlier ones over `--tickets` channels. A recorded file has
+one JSON object per line:
+
+    {"offset": 0.012, "type": "message", "channel_id": "...", "message_id": 123, "content": "..."}
+
+with `type` one of `message`, `edit` or `delete`. `channel_id` must be one of the seeded
+ticket ids when replaying against the in-memory database, `--save` writes the synthetic
+stream in this format so a run can be repeated.
+
+Socket events go to a sink instead of Socket.IO. By default MongoDB is replaced in memory,
+`--mongo` uses `MONGO_URI` (database `ticket_gateway`, dropped first) and counts the
+commands actually sent.
+
+Reported: event-to-emit latency (dispatch until the socket event leaves the emitter),
+handler latency, event loop lag (how long ready tasks wait for the loop) and DB operations
+per event.
+"""
+from collections import Counter
+from pymongo import monitoring
+
+from benchmarks.fakes import (
+    InMemoryDatabase,
+    GUILD_SETTINGS,
+    configure_environment,
+    reset_database,
+    fake_discord_message
+)
+
+import argparse
+import asyncio
+import threading
+import random
+import json
+import time
+
+
+EMITTED_EVENTS = {
+    "message": "message",
+    "edit": "edit_message",
+    "delete": "delete_message",
+}
+
+
+class SocketSink:
+    """
+    Takes the place of the Socket.IO server behind `socket_emitter` and records when each
+    message event was last emitted.
+    """
+    def __init__(self) -> None:
+        self.emitted: dict[tuple, float] = {}
+        self.frames = 0
+
+    def start_background_task(self, target, *args):
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    def emit(self, event: str, data, room: str = None):
+        if event == "events":
+            self.frames += 1
+            return
+        self.emitted[(event, str(data["id"]))] = time.perf_counter()
+
+
+class CommandCounter(monitoring.CommandListener):
+    """pymongo command listener counting commands by name, used with `--mongo`."""
+    def __init__(self) -> None:
+        self.ops = Counter()
+
+    def started(self, event) -> None:
+        self.ops[event.command_name] += 1
+
+    def succeeded(self, event) -> None:
+        pass
+
+    def failed(self, event) -> None:
+        pass
+
+
+def latency_summary(values: list) -> dict:
+    values = sorted(values)
+
+    def percentile(fraction: float) -> float:
+        if not values:
+            return None
+        return round(values[min(len(values) - 1, int(len(values) * fraction))] * 1000, 3)
+
+    return {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99), "max": percentile(1.0)}
+
+
+def synthetic_events(ticket_ids: list, rate: float, duration: float, edits: float, deletes: float, seed: int) -> list:
+    from utils.helper import generate_snowflake_id
+
+    generator = random.Random(seed)
+    live: list[tuple] = []
+    events = []
+    for index in range(int(rate * duration)):
+        roll = generator.random()
+        if live and roll < deletes:
+            channel_id, message_id = live.pop(generator.randrange(len(live)))
+            kind = "delete"
+        elif live and roll < deletes + edits:
+            channel_id, message_id = live[generator.randrange(len(live))]
+            kind = "edit"
+        else:
+            channel_id, message_id = generator.choice(ticket_ids), int(generate_snowflake_id())
+            live.append((channel_id, message_id))
+            kind = "message"
+
+        events.append({
+            "offset": index / rate,
+            "type": kind,
+            "channel_id": channel_id,
+            "message_id": message_id,
+            "content": f"Simulated {kind} {index}",
+        })
+    return events
+
+
+def load_events(path: str) -> list:
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+async def seed_tickets(count: int) -> list:
+    from database.async_tickets import insert_ticket
+    from utils.helper import generate_snowflake_id
+    from utils.schema import Ticket
+
+    ticket_ids = []
+    for index in range(count):
+        ticket = Ticket(
+            id=generate_snowflake_id(),
+            user_id=str(800000000000000000 + index),
+            user_email=f"gateway-{index}@example.com",
+            username=f"gateway-{index}",
+            topic="Gateway replay",
+            webhook_url="http://127.0.0.1/api/webhooks/0/gateway"
+        )
+        await insert_ticket(ticket)
+        ticket_ids.append(ticket.id)
+    return ticket_ids
+
+
+async def dispatch(cog, event: dict) -> None:
+    message = fake_discord_message(int(event["message_id"]), event["channel_id"], event["content"])
+    if event["type"] == "message":
+        await cog.on_message(message)
+    elif event["type"] == "edit":
+        await cog.on_message_edit(message, message)
+    else:
+        await cog.on_message_delete(message)
+
+
+async def probe_loop_lag(samples: list, stop: asyncio.Event, interval: float = 0.005) -> None:
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def replay(cog, events: list, sink: SocketSink) -> dict:
+    from database.async_messages import message_write_buffer
+
+    # Repeated edits of a message are coalesced, only the last dispatch and emit of a key are compared
+    dispatched: dict[tuple, float] = {}
+    handler_latencies = []
+    failures = 0
+    lag_samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop_lag(lag_samples, stop))
+
+    async def handle(event: dict, started: float):
+        nonlocal failures
+        try:
+            await dispatch(cog, event)
+        except Exception as e:
+            failures += 1
+            print(f"Handler failed for {event['type']} {event['message_id']}: {e}")
+            return
+        handler_latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    start = time.perf_counter()
+    for event in events:
+        delay = start + event["offset"] - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = time.perf_counter()
+        dispatched[(EMITTED_EVENTS[event["type"]], str(event["message_id"]))] = now
+        tasks.append(asyncio.create_task(handle(event, now)))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await message_write_buffer.flush()
+
+    # Give the emitter time to drain its last coalescing window
+    deadline = time.perf_counter() + 2
+    while time.perf_counter() < deadline and len(sink.emitted) < len(dispatched):
+        await asyncio.sleep(0.05)
+    stop.set()
+    await probe
+
+    emit_latencies = [
+        sink.emitted.get(key, 0) - dispatched_at
+        for key, dispatched_at in dispatched.items()
+        if sink.emitted.get(key, 0) >= dispatched_at
+    ]
+    return {
+        "events": len(events),
+        "failures": failures,
+        "events_per_second": round(len(events) / elapsed, 1) if elapsed else 0,
+        "not_emitted": len(dispatched) - len(emit_latencies),
+        "event_to_emit_ms": latency_summary(emit_latencies),
+        "handler_ms": latency_summary(handler_latencies),
+        "loop_lag_ms": latency_summary(lag_samples),
+    }
+
+
+async def run(args, ops: Counter) -> dict:
+    from discord_bot.message_handler import MessageHandler
+    from socket_manager.emitter import socket_emitter
+    from socket_manager.replay_buffer import replay_buffer
+
+    sink = SocketSink()
+    socket_emitter.start(sink, replay_buffer)
+    cog = MessageHandler(bot=None)
+
+    ticket_ids = await seed_tickets(args.tickets)
+    if args.events:
+        events = load_events(args.events)
+    else:
+        events = synthetic_events(ticket_ids, args.rate, args.duration, args.edits, args.deletes, args.seed)
+    if args.save:
+        with open(args.save, "w") as file:
+            file.writelines(json.dumps(event) + "\n" for event in events)
+
+    ops.clear()
+    result = await replay(cog, events, sink)
+
+    total_ops = sum(ops.values())
+    result["db_ops"] = dict(ops)
+    result["db_ops_per_event"] = round(total_ops / len(events), 3) if events else 0
+    result["emitter"] = socket_emitter.stats()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=200, help="Synthetic events per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds of synthetic events")
+    parser.add_argument("--tickets", type=int, default=50, help="Seeded ticket channels")
+    parser.add_argument("--edits", type=float, default=0.15, help="Share of synthetic events that are edits")
+    parser.add_argument("--deletes", type=float, default=0.05, help="Share of synthetic events that are deletes")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic stream")
+    parser.add_argument("--events", help="Replay a recorded JSON lines file instead")
+    parser.add_argument("--save", help="Write the replayed events as JSON lines")
+    parser.add_argument("--mongo", action="store_true", help="Use MONGO_URI instead of the in-memory database")
+    parser.add_argument("--output", help="Save the result as JSON")
+    args = parser.parse_args()
+
+    configure_environment(db_name="ticket_gateway")
+    if args.mongo:
+        # Registered before the clients exist so both pick it up
+        counter = CommandCounter()
+        monitoring.register(counter)
+        reset_database()
+        ops = counter.ops
+    else:
+        from utils import mongo_client
+
+        database = InMemoryDatabase()
+        database.sync["settings"].insert_one(GUILD_SETTINGS)
+        mongo_client.mongo_connection.database = database.sync
+        mongo_client.async_mongo_connection.database = database.async_
+        ops = database.ops
+
+    result = asyncio.run(run(args, ops))
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Per-row cost of turning stored message documents into a JSON response.
+
+    python -m benchmarks.hydration [rows]
+
+"before" is the previous path: `Message(**doc)`, then `MessageResponse(**message.model_dump())`,
+then the stdlib JSON encoder. "after" is `from_document` plus `message_response_data` and orjson.
+No database is needed, the documents are generated in memory.
+"""
+from utils.schema import Message, MessageResponse, from_document, message_response_data
+
+import orjson
+import json
+import time
+import sys
+
+
+def make_documents(rows: int) -> list:
+    return [
+        {
+            "_id": index,
+            "id": str(1300000000000000000 + index),
+            "ticket_id": "1200000000000000000",
+            "author_id": "1100000000000000000",
+            "author_name": "support-agent",
+            "content": f"Message number {index} with a bit of text in it",
+            "attachments": ["https://cdn.discordapp.com/attachments/1/2/image.png"] if index % 10 == 0 else [],
+            "delivery_status": "DELIVERED",
+            "created_at": 1700000000 + index,
+            "updated_at": 1700000000 + index,
+        }
+        for index in range(rows)
+    ]
+
+
+def before(documents: list) -> bytes:
+    messages = [Message(**document) for document in documents]
+    return json.dumps([MessageResponse(**message.model_dump()).model_dump(mode="json") for message in messages]).encode()
+
+
+def after(documents: list) -> bytes:
+    messages = [from_document(Message, document) for document in documents]
+    return orjson.dumps([message_response_data(message) for message in messages])
+
+
+def measure(func, rows: int, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Hydration mutates the documents, every run gets fresh ones
+        documents = make_documents(rows)
+        start = time.perf_counter()
+        func(documents)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(rows: int) -> None:
+    before_time = measure(before, rows)
+    after_time = measure(after, rows)
+
+    print(f"rows: {rows}")
+    print(f"before: {before_time * 1000:8.2f} ms total, {before_time / rows * 1e6:6.2f} us/row")
+    print(f"after:  {after_time * 1000:8.2f} ms total, {after_time / rows * 1e6:6.2f} us/row")
+    print(f"speedup: {before_time / after_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
@@ -0,0 +1,369 @@
+"""
+End-to-end load test of `app.py` against a fake Discord and a local MongoDB.
+
+    python -m benchmarks.loadtest [--scenarios tickets,send,history,fanout,ingest]
+                                  [--rate 50] [--duration 10] [--concurrency 32] [--output run.json]
+
+The Flask app is served by the PRODUCTION server on a random port. The bot never logs in:
+its loop runs in a thread, ticket creation is stubbed to return a new channel id, and every
+webhook points at a local HTTP server answering like Discord after `--discord-latency` ms.
+Rate limits are disabled. The database `DB_NAME` (default `ticket_loadtest`) on `MONGO_URI`
+(default `mongodb://localhost:27017`) is dropped and re-seeded on every run.
+
+Requests are sent open loop at `--rate` per second, latency is measured from the time a
+request was scheduled so a slow server is not hidden by a backed up client. Results are
+printed and saved as JSON so runs can be compared over time.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from benchmarks.fakes import (
+    FakeDiscordServer,
+    configure_environment,
+    reset_database,
+    fake_discord_message
+)
+
+import argparse
+import asyncio
+import threading
+import requests
+import json
+import time
+
+
+SCENARIOS = ("tickets", "send", "history", "fanout", "ingest")
+
+
+class Harness:
+    """
+    The booted app with seeded tickets, every ticket belongs to its own user.
+    """
+    def __init__(self, base_url: str, discord: FakeDiscordServer, server, bot, tickets: list) -> None:
+        self.base_url = base_url
+        self.discord = discord
+        self.server = server
+        self.bot = bot
+        self.tickets = tickets
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        # One keep-alive session per load generator thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.discord.shutdown()
+
+
+def boot(args) -> Harness:
+    configure_environment()
+    reset_database()
+    discord = FakeDiscordServer(latency=args.discord_latency / 1000).start()
+
+    # Imported only now, the app reads its configuration at import time
+    import app as web
+    from routes.tickets import ticket_limiter
+    from discord_bot.app import bot, ticket_manager, is_running
+    from database.indexes import ensure_indexes
+    from modules.delivery import delivery_pool
+    from utils.wsgi_server import create_server
+    from utils.helper import generate_snowflake_id
+
+    web.limiter.enabled = False
+    ticket_limiter.enabled = False
+    ensure_indexes()
+
+    async def create_ticket(topic, description=None, user=None):
+        channel_id = int(generate_snowflake_id())
+        return channel_id, discord.webhook_url(channel_id)
+
+    ticket_manager.create_ticket = create_ticket
+    threading.Thread(target=bot.loop.run_forever, daemon=True).start()
+    is_running.set()
+    delivery_pool.start()
+
+    server = create_server(web.app, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    tickets = seed(discord, args.tickets, args.history)
+    return Harness(f"http://127.0.0.1:{server.server_port}", discord, server, bot, tickets)
+
+
+def seed(discord: FakeDiscordServer, tickets: int, history: int) -> list:
+    """
+    Inserts `tickets` active tickets with `history` messages each.
+
+    Returns:
+        list: `(Ticket, token)` pairs.
+    """
+    from database.tickets import insert_ticket
+    from modules.auth import authenticator
+    from utils.helper import generate_snowflake_id
+    from utils.mongo_client import get_database
+    from utils.schema import Ticket, Message
+    from utils.enums import UserRole
+
+    seeded = []
+    for index in range(tickets):
+        user = {
+            "id": str(800000000000000000 + index),
+            "username": f"loadtest-{index}",
+            "email": f"loadtest-{index}@example.com",
+            "role": UserRole.CUSTOMER.value,
+        }
+        channel_id = generate_snowflake_id()
+        ticket = Ticket(
+            id=channel_id,
+            user_id=user["id"],
+            user_email=user["email"],
+            username=user["username"],
+            topic="Load test",
+            description="Seeded by benchmarks.loadtest",
+            webhook_url=discord.webhook_url(channel_id)
+        )
+        insert_ticket(ticket)
+
+        if history:
+            get_database()["messages"].insert_many([
+                Message(
+                    ticket_id=ticket.id,
+                    author_id=user["id"],
+                    author_name=user["username"],
+                    content=f"Seeded message {number}"
+                ).model_dump()
+                for number in range(history)
+            ])
+        seeded.append((ticket, authenticator.jwt.encrypt(user)))
+
+    return seeded
+
+
+def summarize(latencies: list, errors: int, elapsed: float) -> dict:
+    latencies.sort()
+
+    def percentile(fraction: float) -> float:
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1000, 3)
+
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0,
+        "latency_ms": {
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": percentile(1.0),
+        },
+    }
+
+
+def run_open_loop(action, rate: float, duration: float, concurrency: int) -> dict:
+    """
+    Calls `action(index)` `rate` times per second for `duration` seconds on `concurrency`
+    threads. `action` returns whether the request succeeded.
+    """
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(index: int, scheduled: float):
+        nonlocal errors
+        try:
+            success = action(index)
+        except Exception:
+            success = False
+        latency = time.perf_counter() - scheduled
+        with lock:
+            if success:
+                latencies.append(latency)
+            else:
+                errors += 1
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    futures = []
+    start = time.perf_counter()
+    for index in range(int(rate * duration)):
+        scheduled = start + index / rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        futures.append(executor.submit(timed, index, scheduled))
+
+    wait(futures)
+    executor.shutdown()
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+def scenario_tickets(harness: Harness, args) -> dict:
+    def action(index: int) -> bool:
+        _, token = harness.tickets[index % len(harness.tickets)]
+        response = harness.session.post(
+            f"{harness.base_url}/api/v1/tickets",
+            json={"topic": "Load test", "description": f"Ticket {index}"},
+            headers={"Authorization": token}
+        )
+        return response.status_code == 201
+
+    return run_open_loop(action, args.rate, args.duration, args.concurrency)
+
+
+def scenario_send(harness: Harness, args) -> dict:
+    def action(index: int) -> bool:
+        ticket, token = harness.tickets[index % len(harness.tickets)]
+        response = harness.session.post(
+            f"{harness.base_url}/api/v1/tickets/{ticket.id}/messages",
+            json={"content": f"Load test message {index}"},
+            headers={"Authorization": token}
+        )
+        return response.status_code in (201, 202)
+
+    return run_open_loop(action, args.rate, args.duration, args.concurrency)
+
+
+def scenario_history(harness: Harness, args) -> dict:
+    def action(index: int) -> bool:
+        ticket, token = harness.tickets[index % len(harness.tickets)]
+        response = harness.session.get(
+            f"{harness.base_url}/api/v1/tickets/{ticket.id}/messages",
+            params={"limit": 50},
+            headers={"Authorization": token}
+        )
+        return response.status_code == 200
+
+    return run_open_loop(action, args.rate, args.duration, args.concurrency)
+
+
+def scenario_ingest(harness: Harness, args) -> dict:
+    from utils.helper import generate_snowflake_id
+
+    cog = harness.bot.get_cog("MessageHandler")
+
+    def action(index: int) -> bool:
+        ticket, _ = harness.tickets[index % len(harness.tickets)]
+        message = fake_discord_message(int(generate_snowflake_id()), ticket.id, f"Ingested message {index}")
+        future = asyncio.run_coroutine_threadsafe(cog.on_message(message), harness.bot.loop)
+        future.result(timeout=30)
+        return True
+
+    return run_open_loop(action, args.rate, args.duration, args.concurrency)
+
+
+def scenario_fanout(harness: Harness, args) -> dict:
+    """
+    Emits `message` events to `--clients` connected socket clients, round robin, and
+    measures the time from emit to receipt. Events not received within 5 seconds are errors.
+    """
+    import socketio
+    from socket_manager.send_events import send_message_event
+    from utils.schema import Message
+
+    sent: dict[str, float] = {}
+    latencies = []
+    lock = threading.Lock()
+
+    def on_message(data):
+        received = time.perf_counter()
+        with lock:
+            scheduled = sent.pop(data["id"], None)
+            if scheduled is not None:
+                latencies.append(received - scheduled)
+
+    clients = []
+    for ticket, token in harness.tickets[:args.clients]:
+        client = socketio.Client()
+        client.on("message", on_message)
+        client.connect(harness.base_url, transports=["websocket"])
+        client.call("authorize", {"token": token})
+        clients.append((client, ticket))
+
+    start = time.perf_counter()
+    for index in range(int(args.rate * args.duration)):
+        scheduled = start + index / args.rate
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        _, ticket = clients[index % len(clients)]
+        message = Message(
+            ticket_id=ticket.id,
+            author_id="900000000000000000",
+            author_name="support-agent",
+            content=f"Fan-out message {index}"
+        )
+        with lock:
+            sent[message.id] = scheduled
+        send_message_event(user_id=ticket.user_id, message=message)
+
+    elapsed = time.perf_counter() - start
+    deadline = time.perf_counter() + 5
+    while sent and time.perf_counter() < deadline:
+        time.sleep(0.05)
+
+    for client, _ in clients:
+        client.disconnect()
+
+    with lock:
+        return summarize(latencies, len(sent), elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated, any of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--rate", type=float, default=50, help="Requests or events per second")
+    parser.add_argument("--duration", type=float, default=10, help="Seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32, help="Load generator threads")
+    parser.add_argument("--clients", type=int, default=50, help="Socket clients for fanout")
+    parser.add_argument("--tickets", type=int, default=100, help="Seeded tickets")
+    parser.add_argument("--history", type=int, default=200, help="Seeded messages per ticket")
+    parser.add_argument("--discord-latency", type=float, default=50, help="Fake Discord response time in ms")
+    parser.add_argument("--output", help="JSON result file, defaults to loadtest-<timestamp>.json")
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    harness = boot(args)
+    runners = {
+        "tickets": scenario_tickets,
+        "send": scenario_send,
+        "history": scenario_history,
+        "fanout": scenario_fanout,
+        "ingest": scenario_ingest,
+    }
+
+    started_at = datetime.now(timezone.utc)
+    results = {}
+    try:
+        for name in scenarios:
+            results[name] = result = runners[name](harness, args)
+            latency = result["latency_ms"]
+            print(
+                f"{name:<8} {result['rps']:8.1f} req/s  p50 {latency['p50']} ms  p95 {latency['p95']} ms"
+                f"  p99 {latency['p99']} ms  errors {result['errors']}/{result['requests']}"
+            )
+    finally:
+        harness.close()
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key != "output"},
+        "discord_requests": harness.discord.requests,
+        "scenarios": results,
+    }
+    output = args.output or f"loadtest-{started_at.strftime('%Y%m%d-%H%M%S')}.json"
+    with open(output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Saved {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Throughput and latency of the WSGI serving modes under concurrent clients.
+
+    python -m benchmarks.serving [clients] [seconds] [io_ms]
+
+"development" is the threaded Werkzeug server `app.run` starts (one new thread per
+connection, HTTP/1.0). "production" is `utils.wsgi_server.PooledWSGIServer` with the
+`WEB_*` settings from the environment (worker pool, HTTP/1.1).
+The served route sleeps `io_ms` to stand in for a database or Discord round trip.
+No database or Discord is needed.
+"""
+from flask import Flask, jsonify
+from werkzeug.serving import make_server
+
+from utils.wsgi_server import create_server
+
+import http.client
+import logging
+import threading
+import time
+import sys
+
+
+def make_app(io_ms: float) -> Flask:
+    app = Flask(__name__)
+
+    @app.route("/ping")
+    def ping():
+        time.sleep(io_ms / 1000)
+        return jsonify({"ok": True})
+
+    return app
+
+
+def run_clients(port: int, clients: int, seconds: float) -> tuple:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        nonlocal errors
+        connection = None
+        samples = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            if connection is None:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+            start = time.perf_counter()
+            try:
+                connection.request("GET", "/ping")
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                else:
+                    samples.append(time.perf_counter() - start)
+                if response.will_close:
+                    connection.close()
+                    connection = None
+            except OSError:
+                failed += 1
+                connection.close()
+                connection = None
+
+        if connection is not None:
+            connection.close()
+        with lock:
+            latencies.extend(samples)
+            errors += failed
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+
+def percentile(values: list, fraction: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(server, clients: int, seconds: float) -> dict:
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        latencies, errors = run_clients(server.server_port, clients, seconds)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / seconds,
+        "p50": percentile(latencies, 0.50) if latencies else 0,
+        "p99": percentile(latencies, 0.99) if latencies else 0,
+        "errors": errors,
+    }
+
+
+def main(clients: int, seconds: float, io_ms: float) -> None:
+    # Request logging is left out of the comparison, production has it off by default
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    app = make_app(io_ms)
+    modes = {
+        "development": lambda: make_server("127.0.0.1", 0, app, threaded=True),
+        "production": lambda: create_server(app, "127.0.0.1", 0),
+    }
+
+    print(f"clients: {clients}, seconds: {seconds}, io: {io_ms} ms")
+    for name, factory in modes.items():
+        result = measure(factory(), clients, seconds)
+        print(
+            f"{name:<12} {result['rps']:8.0f} req/s  p50 {result['p50'] * 1000:7.2f} ms"
+            f"  p99 {result['p99'] * 1000:7.2f} ms  errors {result['errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 32,
+        float(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        float(sys.argv[3]) if len(sys.argv) > 3 else 5
+    )
@@ -0,0 +1,25 @@
+from utils.mongo_client import get_async_database
+from utils.schema import Message
+
+from modules.decorator import async_database_error_handler
+
+import time
+
+
+# Asyncio counterpart of `database.delivery_queue.enqueue_delivery`, the workers keep using the sync functions.
+
+def _collection():
+    return get_async_database()["delivery_queue"]
+
+
+@async_database_error_handler
+async def enqueue_delivery(message: Message, user_id: str, webhook_url: str) -> None:
+    await _collection().insert_one({
+        "id": message.id,
+        "ticket_id": message.ticket_id,
+        "user_id": str(user_id),
+        "webhook_url": webhook_url,
+        "content": message.content,
+        "attempts": 0,
+        "available_at": time.time(),
+    })
@@ -0,0 +1,330 @@
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from utils.mongo_client import get_async_database
+from utils.helper import generate_timestamp
+
+from utils.schema import (
+    Message,
+    from_document
+)
+
+
+from modules.decorator import async_database_error_handler
+from database.messages import (
+    MESSAGE_RESPONSE_PROJECTION,
+    NOT_DELETED,
+    TOMBSTONE,
+    reserve_versions_update,
+    committed_version,
+    messages_page_query,
+    messages_page_sort
+)
+
+from contextlib import asynccontextmanager
+
+import asyncio
+import time
+import logging
+import os
+
+
+logger = logging.getLogger("database")
+
+
+# Asyncio counterparts of `database.messages` for the Discord bot.
+
+def _collection():
+    return get_async_database()['messages']
+
+def _version_collection():
+    return get_async_database()['message_versions']
+
+
+@async_database_error_handler
+async def reserve_message_versions(ticket_id: str, count: int = 1) -> int:
+    data = await _version_collection().find_one_and_update(
+        {'id': str(ticket_id)},
+        reserve_versions_update(count, time.time()),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    return data['version']
+
+@async_database_error_handler
+async def release_message_versions(ticket_id: str, last: int) -> None:
+    await _version_collection().update_one(
+        {'id': str(ticket_id)},
+        {'$pull': {'pending': {'last': last}}}
+    )
+
+@async_database_error_handler
+async def fetch_committed_version(ticket_id: str) -> int:
+    return committed_version(await _version_collection().find_one({'id': str(ticket_id)}), time.time())
+
+
+@asynccontextmanager
+async def message_versions(ticket_id: str, count: int = 1):
+    """Async counterpart of `database.messages.message_versions`."""
+    last = await reserve_message_versions(ticket_id, count)
+    try:
+        yield last
+    finally:
+        await release_message_versions(ticket_id, last)
+
+
+@async_database_error_handler
+async def insert_message(data: Message):
+    async with message_versions(data.ticket_id) as version:
+        data.version = version
+        result = await _collection().insert_one(
+            data.model_dump()
+        )
+    return result
+
+@async_database_error_handler
+async def fetch_messages(ticket_id: str) -> list[Message]:
+    query = {
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
+    }
+    return [from_document(Message, data) async for data in _collection().find(query)]
+
+
+@async_database_error_handler
+async def fetch_messages_page(
+    ticket_id: str,
+    before: str = None,
+    after: str = None,
+    limit: int = 50,
+    descending: bool = False
+) -> list[dict]:
+    """
+    Async counterpart of `database.messages.fetch_messages_page`.
+    """
+    query = messages_page_query(ticket_id, before, after)
+    cursor = _collection().find(
+        query,
+        MESSAGE_RESPONSE_PROJECTION
+    ).sort(messages_page_sort(descending)).limit(limit)
+    return await cursor.to_list(None)
+
+
+@async_database_error_handler
+async def fetch_message_changes(ticket_id: str, since: int, until: int, limit: int = 100):
+    """
+    Async counterpart of `database.messages.fetch_message_changes`, returns a lazy `AsyncCursor`.
+    """
+    query = {
+        'ticket_id': str(ticket_id),
+        'version': {'$gt': since, '$lte': until}
+    }
+    return _collection().find(
+        query,
+        {**MESSAGE_RESPONSE_PROJECTION, 'deleted': 1}
+    ).sort('version', 1).limit(limit)
+
+
+@async_database_error_handler
+async def fetch_transcript_messages(ticket_id: str) -> list[dict]:
+    """
+    Returns the raw message documents of a ticket in creation order, for the transcript renderer.
+    """
+    query = {
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
+    }
+    projection = {'_id': 0, 'author_name': 1, 'content': 1, 'attachments': 1, 'created_at': 1, 'updated_at': 1}
+    return await _collection().find(query, projection).sort(messages_page_sort()).to_list(None)
+
+
+@async_database_error_handler
+async def update_message_content(ticket_id: str, message_id: str, content: str) -> Message:
+    if not isinstance(content, str):
+        raise ValueError("content must be a string")
+        
+    query = {
+        'id': str(message_id),
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
+    }
+    async with message_versions(ticket_id) as version:
+        data = await _collection().find_one_and_update(
+            query,
+            {'$set': {'content': content, 'updated_at': generate_timestamp(), 'version': version}},
+            return_document=True
+        )
+    if data:
+        return from_document(Message, data)
+    
+    return None
+
+
+@async_database_error_handler
+async def delete_message(ticket_id: str, message_id: str):
+    """Replaces the message with a tombstone and returns it."""
+    query = {
+        'id': str(message_id),
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
+    }
+    async with message_versions(ticket_id) as version:
+        data = await _collection().find_one_and_update(
+            query,
+            {'$set': {**TOMBSTONE, 'updated_at': generate_timestamp(), 'version': version}},
+            return_document=True
+        )
+    if data:
+        return from_document(Message, data)
+    return None
+
+
+class MessageWriteBuffer:
+    """
+    Write-behind buffer that coalesces message inserts into `insert_many(ordered=False)` batches.
+
+    A batch is flushed once `batch_size` messages are pending or `flush_interval` seconds
+    after the first pending message, whichever comes first. When disabled every message
+    is inserted straight away.
+
+    A batch that fails is retried with the next one, messages are dropped after `max_attempts`
+    failed flushes. Once `max_pending` messages wait, new ones are inserted straight away so
+    an unavailable database fails the caller instead of growing the buffer.
+    """
+    def __init__(
+        self,
+        enabled: bool = False,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_attempts: int = 5,
+        max_pending: int = 10000
+    ) -> None:
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self.max_pending = max_pending
+
+        self._pending: dict[str, dict] = {}
+        self._attempts: dict[str, int] = {}
+        self._in_flight: set[str] = set()
+        self._timer: asyncio.Task = None
+        self._flush_tasks: set[asyncio.Task] = set()
+        self._lock: asyncio.Lock = None
+
+    async def add(self, message: Message) -> None:
+        if not self.enabled or len(self._pending) >= self.max_pending:
+            await insert_message(message)
+            return
+
+        self._pending[message.id] = message.model_dump()
+        if len(self._pending) >= self.batch_size:
+            task = asyncio.create_task(self.flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    def is_pending(self, message_id: str) -> bool:
+        """
+        True while the message is not yet stored, `flush` waits for in flight batches.
+        """
+        message_id = str(message_id)
+        return message_id in self._pending or message_id in self._in_flight
+
+    async def flush(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._timer is not None and self._timer is not asyncio.current_task():
+                self._timer.cancel()
+            self._timer = None
+
+            documents = list(self._pending.values())
+            self._pending.clear()
+            if not documents:
+                return
+
+            self._in_flight = {document["id"] for document in documents}
+            reservations = []
+            retry = False
+            try:
+                await self._assign_versions(documents, reservations)
+                await _collection().insert_many(documents, ordered=False)
+            except BulkWriteError as e:
+                # Duplicate ids mean the message is already stored, anything else is lost
+                errors = [error for error in e.details.get("writeErrors", []) if error.get("code") != 11000]
+                if errors:
+                    logger.error("Failed to insert %d of %d buffered messages: %s", len(errors), len(documents), errors[0].get('errmsg'))
+            except PyMongoError as e:
+                logger.warning("Failed to flush %d buffered messages, retrying with the next batch: %s", len(documents), e)
+                retry = True
+            finally:
+                self._in_flight = set()
+                await self._release_versions(reservations)
+
+            if retry:
+                self._requeue(documents)
+            else:
+                for document in documents:
+                    self._attempts.pop(document["id"], None)
+
+    def _requeue(self, documents: list) -> None:
+        dropped = 0
+        for document in documents:
+            attempts = self._attempts.get(document["id"], 0) + 1
+            if attempts >= self.max_attempts:
+                self._attempts.pop(document["id"], None)
+                dropped += 1
+                continue
+
+            self._attempts[document["id"]] = attempts
+            self._pending.setdefault(document["id"], document)
+
+        if dropped:
+            logger.error("Dropped %d buffered messages after %d failed flushes", dropped, self.max_attempts)
+        if self._pending:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def close(self) -> None:
+        """
+        Flushes everything that is still pending, call before the event loop stops.
+        """
+        await self.flush()
+
+    async def _assign_versions(self, documents: list, reservations: list) -> None:
+        """
+        Reserves one range of versions per ticket in the batch and adds `(ticket_id, last)` to
+        `reservations`, retried batches get new ones.
+        """
+        by_ticket: dict[str, list] = {}
+        for document in documents:
+            by_ticket.setdefault(document["ticket_id"], []).append(document)
+
+        for ticket_id, ticket_documents in by_ticket.items():
+            last = await reserve_message_versions(ticket_id, len(ticket_documents))
+            reservations.append((ticket_id, last))
+            for version, document in enumerate(ticket_documents, start=last - len(ticket_documents) + 1):
+                document["version"] = version
+
+    async def _release_versions(self, reservations: list) -> None:
+        for ticket_id, last in reservations:
+            try:
+                await release_message_versions(ticket_id, last)
+            except PyMongoError as e:
+                # Sync stops waiting for the range after `VERSION_RESERVATION_TIMEOUT`
+                logger.warning("Failed to release message versions of ticket %s: %s", ticket_id, e)
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+
+message_write_buffer = MessageWriteBuffer(
+    enabled=os.getenv("MESSAGE_WRITE_BEHIND", "false").lower() == "true",
+    batch_size=int(os.getenv("MESSAGE_WRITE_BATCH_SIZE", 100)),
+    flush_interval=float(os.getenv("MESSAGE_WRITE_FLUSH_INTERVAL", 0.5)),
+    max_attempts=int(os.getenv("MESSAGE_WRITE_MAX_ATTEMPTS", 5)),
+    max_pending=int(os.getenv("MESSAGE_WRITE_MAX_PENDING", 10000))
+)
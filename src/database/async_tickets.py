@@ -0,0 +1,99 @@
+from utils.schema import Ticket, from_document
+from utils.enums import TicketStatus, IssueLevel, SupportRole
+from utils.helper import generate_timestamp
+from utils.mongo_client import get_async_database
+
+from modules.decorator import async_database_error_handler
+from modules.validator import validate_fields
+
+from database.tickets import (
+    ticket_cache,
+    user_tickets_query,
+    TICKET_RESPONSE_PROJECTION,
+    TICKET_LIST_SORT
+)
+
+
+# Asyncio counterparts of `database.tickets` for the Discord bot, they share the same ticket cache.
+
+def _collection():
+    return get_async_database()["tickets"]
+
+
+
+@async_database_error_handler
+async def insert_ticket(ticket: Ticket) -> None:
+    if not isinstance(ticket, Ticket):
+        raise ValueError("ticket must be an instance of Ticket")
+        
+    result = await _collection().insert_one(ticket.model_dump())
+    await ticket_cache.set_async(ticket)
+    return result
+
+
+@async_database_error_handler
+async def fetch_ticket(ticket_id: str, user_id: str = None) -> Ticket:
+    ticket = ticket_cache.get(ticket_id)
+    if ticket is None:
+        data = await _collection().find_one({"id": str(ticket_id)})
+        if not data:
+            return None
+
+        ticket = from_document(Ticket, data)
+        ticket_cache.set(ticket, broadcast=False)
+
+    if user_id and ticket.user_id != str(user_id):
+        return None
+
+    return ticket
+
+@async_database_error_handler
+async def fetch_user_tickets_page(
+    user_id: str,
+    status: TicketStatus,
+    issue_level: IssueLevel = None,
+    support_role: SupportRole = None,
+    after: str = None,
+    limit: int = 50
+) -> list[dict]:
+    query = user_tickets_query(user_id, status, issue_level, support_role, after)
+    cursor = _collection().find(query, TICKET_RESPONSE_PROJECTION).sort(TICKET_LIST_SORT).limit(limit)
+    return await cursor.to_list(None)
+
+@async_database_error_handler
+async def count_user_tickets(
+    user_id: str,
+    status: TicketStatus,
+    issue_level: IssueLevel = None,
+    support_role: SupportRole = None
+) -> int:
+    return await _collection().count_documents(user_tickets_query(user_id, status, issue_level, support_role))
+
+@async_database_error_handler
+async def update_ticket_status(ticket_id: str, status: TicketStatus) -> Ticket:
+    query = {"id": str(ticket_id)}
+    update = {"$set": {"status": status.value, "updated_at": generate_timestamp()}}
+    result = await _collection().find_one_and_update(query, update, return_document=True)
+    if not result:
+        await ticket_cache.invalidate_async(ticket_id)
+        return None
+    
+    ticket = from_document(Ticket, result)
+    await ticket_cache.set_async(ticket)
+    return ticket
+
+
+
+@async_database_error_handler
+@validate_fields(Ticket)
+async def update_ticket(id: str , **kwargs) -> Ticket:
+    query = {"id": str(id)}
+    update = {"$set": kwargs}
+    result = await _collection().find_one_and_update(query, update, return_document=True)
+    if not result:
+        await ticket_cache.invalidate_async(id)
+        return None
+
+    ticket = from_document(Ticket, result)
+    await ticket_cache.set_async(ticket)
+    return ticket
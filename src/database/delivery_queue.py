@@ -0,0 +1,60 @@
+from pymongo import ASCENDING, ReturnDocument
+
+from utils.mongo_client import get_database
+from utils.schema import Message
+
+from modules.decorator import database_error_handler
+
+import time
+
+
+delivery_collection = get_database()["delivery_queue"]
+
+# Seconds a claimed job stays invisible to other workers, an unfinished job is retried after it
+CLAIM_LEASE_SECONDS = 60
+
+
+@database_error_handler
+def enqueue_delivery(message: Message, user_id: str, webhook_url: str) -> None:
+    delivery_collection.insert_one({
+        "id": message.id,
+        "ticket_id": message.ticket_id,
+        "user_id": str(user_id),
+        "webhook_url": webhook_url,
+        "content": message.content,
+        "attempts": 0,
+        "available_at": time.time(),
+    })
+
+
+@database_error_handler
+def claim_delivery() -> dict:
+    """
+    Claims the oldest due job by pushing its `available_at` past the lease.
+
+    Returns:
+        dict: The claimed job, or None if nothing is due.
+    """
+    now = time.time()
+    return delivery_collection.find_one_and_update(
+        {"available_at": {"$lte": now}},
+        {"$set": {"available_at": now + CLAIM_LEASE_SECONDS}},
+        sort=[("available_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+@database_error_handler
+def complete_delivery(job_id: str) -> None:
+    delivery_collection.delete_one({"id": str(job_id)})
+
+
+@database_error_handler
+def retry_delivery(job_id: str, delay: float) -> None:
+    delivery_collection.update_one(
+        {"id": str(job_id)},
+        {
+            "$set": {"available_at": time.time() + delay},
+            "$inc": {"attempts": 1}
+        }
+    )
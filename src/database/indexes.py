@@ -0,0 +1,149 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.collection import Collection
+
+from utils.mongo_client import get_database
+from utils.enums import TicketStatus
+
+import sys
+
+
+# Every index the data layer relies on, keyed by collection name.
+# `create_indexes` is a no-op for indexes that already exist with the same spec,
+# so this is safe to run on every startup.
+REQUIRED_INDEXES = {
+    "tickets": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        # Ticket listings: equality filters first, then the `updated_at`, `id` sort.
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)],
+            name="user_id_status_updated_at"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("issue_level", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)],
+            name="user_id_status_issue_level_updated_at"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("status", ASCENDING), ("support_role", ASCENDING), ("updated_at", DESCENDING), ("id", DESCENDING)],
+            name="user_id_status_support_role_updated_at"
+        ),
+    ],
+    "messages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("ticket_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="ticket_id_created_at_id"),
+        IndexModel([("ticket_id", ASCENDING), ("version", ASCENDING)], name="ticket_id_version"),
+    ],
+    "message_versions": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+    "delivery_queue": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("available_at", ASCENDING)], name="available_at"),
+    ],
+    "settings": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+    ],
+}
+
+
+# Filter (and optional sort) of every query issued from `database/` and `utils/settings.py`.
+# Keep this in sync when adding a new query so `check` covers it.
+QUERY_SHAPES = [
+    ("tickets", "fetch_ticket", {"id": "0"}, None),
+    ("tickets", "fetch_user_tickets_page", {"user_id": "0", "status": TicketStatus.ACTIVE.value}, [("updated_at", DESCENDING), ("id", DESCENDING)]),
+    ("tickets", "fetch_user_tickets_page (issue_level)", {"user_id": "0", "status": TicketStatus.ACTIVE.value, "issue_level": "URGENT"}, [("updated_at", DESCENDING), ("id", DESCENDING)]),
+    ("tickets", "fetch_user_tickets_page (support_role)", {"user_id": "0", "status": TicketStatus.ACTIVE.value, "support_role": "TECHNICAL"}, [("updated_at", DESCENDING), ("id", DESCENDING)]),
+    ("tickets", "count_user_tickets", {"user_id": "0", "status": TicketStatus.ACTIVE.value}, None),
+    ("tickets", "update_ticket_status / update_ticket", {"id": "0"}, None),
+    ("messages", "fetch_messages", {"ticket_id": "0", "deleted": {"$ne": True}}, None),
+    ("messages", "fetch_messages_page", {"ticket_id": "0", "deleted": {"$ne": True}, "$or": [{"created_at": {"$gt": 0}}, {"created_at": 0, "id": {"$gt": "0"}}]}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("messages", "fetch_transcript_messages", {"ticket_id": "0", "deleted": {"$ne": True}}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("messages", "fetch_message_changes", {"ticket_id": "0", "version": {"$gt": 0, "$lte": 0}}, [("version", ASCENDING)]),
+    ("messages", "update_message_content / delete_message", {"id": "0", "ticket_id": "0", "deleted": {"$ne": True}}, None),
+    ("messages", "update_message_delivery_status", {"id": "0", "ticket_id": "0"}, None),
+    ("message_versions", "reserve / release / fetch_committed_version", {"id": "0"}, None),
+    ("delivery_queue", "claim_delivery", {"available_at": {"$lte": 0}}, [("available_at", ASCENDING)]),
+    ("delivery_queue", "complete_delivery / retry_delivery", {"id": "0"}, None),
+    ("settings", "load_settings / update_settings", {"id": "guild_settings"}, None),
+]
+
+
+def ensure_indexes() -> None:
+    """
+    Builds every index declared in `REQUIRED_INDEXES`, existing ones are left untouched.
+    """
+    database = get_database()
+    for collection_name, indexes in REQUIRED_INDEXES.items():
+        database[collection_name].create_indexes(indexes)
+
+
+def _plan_stages(plan: dict):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _plan_stages(plan["inputStage"])
+    for stage in plan.get("inputStages", []):
+        yield from _plan_stages(stage)
+
+
+def explain_query(collection: Collection, query: dict, sort: list = None) -> list:
+    """
+    Returns the list of stages in the winning plan of a query.
+    """
+    cursor = collection.find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+
+    winning_plan = cursor.explain()["queryPlanner"]["winningPlan"]
+    # Newer servers wrap the classic plan when the slot based engine is used
+    winning_plan = winning_plan.get("queryPlan", winning_plan)
+    return [stage for stage in _plan_stages(winning_plan) if stage]
+
+
+def check_query_plans() -> list:
+    """
+    Runs `explain()` for every entry in `QUERY_SHAPES`.
+
+    Returns:
+        list: `(collection, query name, stages)` for every query that falls back to a COLLSCAN.
+    """
+    database = get_database()
+    failures = []
+    for collection_name, name, query, sort in QUERY_SHAPES:
+        stages = explain_query(database[collection_name], query, sort)
+        if "COLLSCAN" in stages:
+            failures.append((collection_name, name, stages))
+
+    return failures
+
+
+def main(argv: list) -> int:
+    command = argv[0] if argv else "check"
+
+    if command == "ensure":
+        ensure_indexes()
+        print("Indexes are up to date")
+        return 0
+
+    if command == "backfill":
+        from database.messages import backfill_message_versions
+
+        print(f"Versioned {backfill_message_versions()} messages")
+        return 0
+
+    if command == "check":
+        failures = check_query_plans()
+        for collection_name, name, stages in failures:
+            print(f"COLLSCAN: {collection_name}.{name} -> {' > '.join(stages)}")
+
+        if failures:
+            print(f"{len(failures)} of {len(QUERY_SHAPES)} queries are not using an index")
+            return 1
+
+        print(f"All {len(QUERY_SHAPES)} queries are using an index")
+        return 0
+
+    print("Usage: python -m database.indexes [ensure|check|backfill]")
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,30 +1,242 @@
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.cursor import Cursor
+from contextlib import contextmanager
+
 from utils.mongo_client import get_database
+from utils.helper import generate_timestamp
 
 from utils.schema import (
-    Message
+    Message,
+    from_document
 )
+from utils.enums import DeliveryStatus
 
 
 from modules.decorator import database_error_handler
 
+import time
+
 
 message_collection = get_database()['messages']
+# Per ticket change counter, every write to a message stores the next value as its `version`
+version_collection = get_database()['message_versions']
+
+# Seconds a reserved version range holds back sync when its writer never releases it
+VERSION_RESERVATION_TIMEOUT = 30
+
+# Fields returned to API clients, mirrors `MessageResponse`
+MESSAGE_RESPONSE_PROJECTION = {
+    '_id': 0,
+    'id': 1,
+    'ticket_id': 1,
+    'author_id': 1,
+    'author_name': 1,
+    'content': 1,
+    'attachments': 1,
+    'delivery_status': 1,
+    'created_at': 1,
+    'updated_at': 1,
+    'version': 1,
+}
+
+# Deleted messages stay as tombstones so incremental sync can report them
+NOT_DELETED = {'$ne': True}
+TOMBSTONE = {'content': '', 'attachments': [], 'deleted': True}
+
+
+def reserve_versions_update(count: int, now: float) -> list:
+    """
+    Pipeline update that raises a ticket's `version` by `count` and records the reserved
+    range in `pending` until the writer releases it. Ranges past `VERSION_RESERVATION_TIMEOUT`
+    no longer hold anything back and are pruned, so writers that died never grow `pending`.
+    """
+    return [
+        {'$set': {'version': {'$add': [{'$ifNull': ['$version', 0]}, count]}}},
+        {'$set': {'pending': {'$concatArrays': [
+            {'$filter': {
+                'input': {'$ifNull': ['$pending', []]},
+                'cond': {'$gt': ['$$this.at', now - VERSION_RESERVATION_TIMEOUT]}
+            }},
+            [{'first': {'$subtract': ['$version', count - 1]}, 'last': '$version', 'at': now}]
+        ]}}},
+    ]
+
+def committed_version(document: dict, now: float) -> int:
+    """
+    Highest version of a ticket up to which every reserved version is written. Ranges of
+    writers that never released them stop holding it back after `VERSION_RESERVATION_TIMEOUT`.
+    """
+    if not document:
+        return 0
+
+    pending = [
+        reservation['first'] for reservation in document.get('pending', [])
+        if reservation['at'] > now - VERSION_RESERVATION_TIMEOUT
+    ]
+    return min(pending) - 1 if pending else document['version']
 
 
 @database_error_handler
-def insert_message(data: Message):
-    result = message_collection.insert_one(
-        data.model_dump()
+def reserve_message_versions(ticket_id: str, count: int = 1) -> int:
+    """Reserves `count` versions of a ticket and returns the highest one."""
+    data = version_collection.find_one_and_update(
+        {'id': str(ticket_id)},
+        reserve_versions_update(count, time.time()),
+        upsert=True,
+        return_document=ReturnDocument.AFTER
     )
+    return data['version']
+
+@database_error_handler
+def release_message_versions(ticket_id: str, last: int) -> None:
+    version_collection.update_one(
+        {'id': str(ticket_id)},
+        {'$pull': {'pending': {'last': last}}}
+    )
+
+@database_error_handler
+def fetch_committed_version(ticket_id: str) -> int:
+    return committed_version(version_collection.find_one({'id': str(ticket_id)}), time.time())
+
+
+@contextmanager
+def message_versions(ticket_id: str, count: int = 1):
+    """
+    Reserves versions for a write and releases them once it is done, failed writes leave a gap.
+
+    Sync only hands out tokens up to `fetch_committed_version`, so a version reserved but not
+    yet written is never skipped by a client that already saw a later one. That costs two
+    small updates of the ticket's version document on top of the write, both on its `id`
+    index; batched writes (`MessageWriteBuffer`) pay them once per ticket and batch.
+    """
+    last = reserve_message_versions(ticket_id, count)
+    try:
+        yield last
+    finally:
+        release_message_versions(ticket_id, last)
+
+
+@database_error_handler
+def insert_message(data: Message):
+    with message_versions(data.ticket_id) as version:
+        data.version = version
+        result = message_collection.insert_one(
+            data.model_dump()
+        )
     return result
 
+@database_error_handler
+def backfill_message_versions() -> int:
+    """
+    Versions the messages stored before sync existed, in the order they were sent, so a sync
+    from `0` returns them. Safe to run again and while the app is running.
+
+    Returns:
+        int: Number of messages versioned.
+    """
+    unversioned = {'version': {'$exists': False}}
+    total = 0
+    for ticket_id in message_collection.distinct('ticket_id', unversioned):
+        message_ids = [
+            document['id'] for document in message_collection.find(
+                {'ticket_id': ticket_id, **unversioned},
+                {'_id': 0, 'id': 1}
+            ).sort(messages_page_sort())
+        ]
+        if not message_ids:
+            continue
+
+        with message_versions(ticket_id, len(message_ids)) as last:
+            first = last - len(message_ids) + 1
+            message_collection.bulk_write([
+                UpdateOne({'id': message_id, **unversioned}, {'$set': {'version': first + offset}})
+                for offset, message_id in enumerate(message_ids)
+            ], ordered=False)
+        total += len(message_ids)
+
+    return total
+
+
 @database_error_handler
 def fetch_messages(ticket_id: int) -> list[Message]:
     query = {
-        'ticket_id': ticket_id
+        'ticket_id': ticket_id,
+        'deleted': NOT_DELETED
     }
     result = message_collection.find(query)
-    return [Message(**data) for data in result]
+    return [from_document(Message, data) for data in result]
+
+
+def messages_page_query(ticket_id: str, before: str = None, after: str = None) -> dict:
+    """
+    Filter of one page of a ticket's history. `before` and `after` are `<created_at>:<id>`
+    cursors of a message, see `message_page_cursor`.
+    """
+    query = {
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
+    }
+    bounds = []
+    for cursor, operator in ((before, '$lt'), (after, '$gt')):
+        if cursor:
+            created_at, message_id = cursor.split(':', 1)
+            bounds.append({'$or': [
+                {'created_at': {operator: int(created_at)}},
+                {'created_at': int(created_at), 'id': {operator: message_id}}
+            ]})
+    if len(bounds) == 1:
+        query.update(bounds[0])
+    elif bounds:
+        query['$and'] = bounds
+    return query
+
+def message_page_cursor(message: dict) -> str:
+    return f"{message['created_at']}:{message['id']}"
+
+def messages_page_sort(descending: bool = False) -> list:
+    """
+    Messages are ordered by `created_at`, ids only break ties: API messages get snowflakes
+    of the Unix epoch and Discord messages ones of the Discord epoch, which do not compare.
+    """
+    direction = DESCENDING if descending else ASCENDING
+    return [('created_at', direction), ('id', direction)]
+
+
+@database_error_handler
+def fetch_messages_page(
+    ticket_id: str,
+    before: str = None,
+    after: str = None,
+    limit: int = 50,
+    descending: bool = False
+) -> list[dict]:
+    """
+    Returns one page of a ticket's messages as `MessageResponse` shaped documents in
+    creation order.
+    """
+    query = messages_page_query(ticket_id, before, after)
+    cursor = message_collection.find(
+        query,
+        MESSAGE_RESPONSE_PROJECTION
+    ).sort(messages_page_sort(descending)).limit(limit)
+    return list(cursor)
+
+
+@database_error_handler
+def fetch_message_changes(ticket_id: str, since: int, until: int, limit: int = 100) -> Cursor:
+    """
+    Returns a lazy cursor over the messages of a ticket created, edited or deleted after
+    version `since` up to `until`, in version order. Deleted messages are tombstones with
+    `deleted` set.
+    """
+    query = {
+        'ticket_id': str(ticket_id),
+        'version': {'$gt': since, '$lte': until}
+    }
+    return message_collection.find(
+        query,
+        {**MESSAGE_RESPONSE_PROJECTION, 'deleted': 1}
+    ).sort('version', ASCENDING).limit(limit)
 
 
 @database_error_handler
@@ -34,28 +246,52 @@ def update_message_content(ticket_id: str, message_id: str, content: str) -> Mes
         
     query = {
         'id': str(message_id),
-        'ticket_id': str(ticket_id)
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
     }
-    data = message_collection.find_one_and_update(
-        query,
-        {'$set': {'content': content}},
-        return_document=True
-        
-    )
+    with message_versions(ticket_id) as version:
+        data = message_collection.find_one_and_update(
+            query,
+            {'$set': {'content': content, 'updated_at': generate_timestamp(), 'version': version}},
+            return_document=True
+        )
     if data:
-        return Message(**data)
+        return from_document(Message, data)
     
     return None
 
 
 @database_error_handler
-def delete_message(message_id: str):
+def delete_message(ticket_id: str, message_id: str):
+    """Replaces the message with a tombstone and returns it."""
     query = {
-        'id': str(message_id)
+        'id': str(message_id),
+        'ticket_id': str(ticket_id),
+        'deleted': NOT_DELETED
     }
-    data = message_collection.find_one_and_delete(query)
+    with message_versions(ticket_id) as version:
+        data = message_collection.find_one_and_update(
+            query,
+            {'$set': {**TOMBSTONE, 'updated_at': generate_timestamp(), 'version': version}},
+            return_document=True
+        )
     if data:
-        return Message(**data)
+        return from_document(Message, data)
     return None
 
-        
\ No newline at end of file
+
+@database_error_handler
+def update_message_delivery_status(ticket_id: str, message_id: str, status: DeliveryStatus) -> Message:
+    query = {
+        'id': str(message_id),
+        'ticket_id': str(ticket_id)
+    }
+    with message_versions(ticket_id) as version:
+        data = message_collection.find_one_and_update(
+            query,
+            {'$set': {'delivery_status': status.value, 'version': version}},
+            return_document=True
+        )
+    if data:
+        return from_document(Message, data)
+    return None
@@ -1,15 +1,43 @@
-from utils.schema import Ticket
-from utils.enums import TicketStatus
-from typing_extensions import List
+from pymongo import DESCENDING
+
+from utils.schema import Ticket, from_document
+from utils.enums import TicketStatus, IssueLevel, SupportRole
+from utils.helper import generate_timestamp
 from utils.mongo_client import get_database
 from pydantic import ValidationError
 
 from modules.decorator import database_error_handler
 
 from modules.validator import validate_fields
+from modules.cache import TicketCache
+
+import os
 
 ticket_collection = get_database()["tickets"]
 
+# Fields returned to API clients, mirrors `TicketResponse`
+TICKET_RESPONSE_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "user_id": 1,
+    "topic": 1,
+    "description": 1,
+    "status": 1,
+    "created_at": 1,
+    "updated_at": 1,
+    "user_role": 1,
+    "support_role": 1,
+    "issue_level": 1,
+}
+
+# Ticket listings are newest first, ids break ties between tickets updated in the same second
+TICKET_LIST_SORT = [("updated_at", DESCENDING), ("id", DESCENDING)]
+
+ticket_cache = TicketCache(
+    maxsize=int(os.getenv("TICKET_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("TICKET_CACHE_TTL", 60)),
+    redis_url=os.getenv("TICKET_CACHE_REDIS_URL")
+)
 
 
 
@@ -19,50 +47,98 @@ def insert_ticket(ticket: Ticket) -> None:
     if not isinstance(ticket, Ticket):
         raise ValueError("ticket must be an instance of Ticket")
         
-    return ticket_collection.insert_one(ticket.model_dump())
+    result = ticket_collection.insert_one(ticket.model_dump())
+    ticket_cache.set(ticket)
+    return result
 
 
 @database_error_handler
 def fetch_ticket(ticket_id: str, user_id: str = None) -> Ticket:
-    filter = {"id": str(ticket_id)}
-    if user_id:
-        filter["user_id"] = str(user_id)
+    ticket = ticket_cache.get(ticket_id)
+    if ticket is None:
+        data = ticket_collection.find_one({"id": str(ticket_id)})
+        if not data:
+            return None
 
-    data = ticket_collection.find_one(filter)
-    if data:
-        return Ticket(**data)
-    
-    return None 
+        ticket = from_document(Ticket, data)
+        ticket_cache.set(ticket, broadcast=False)
 
-@database_error_handler
-def fetch_user_tickets(user_id: str, status: List[TicketStatus]) -> List[Ticket]:
-    # Convert status list to their string values for querying
-    status_values = [s.value for s in status]
+    # Ownership is checked against the cached ticket so one entry serves every caller
+    if user_id and ticket.user_id != str(user_id):
+        return None
 
-    # Build the query
+    return ticket
+
+def user_tickets_query(
+    user_id: str,
+    status: TicketStatus,
+    issue_level: IssueLevel = None,
+    support_role: SupportRole = None,
+    after: str = None
+) -> dict:
+    """
+    Filter of a user's ticket listing. `after` is the `<updated_at>:<id>` cursor of the
+    last ticket of the previous page.
+    """
     query = {
         "user_id": str(user_id),
-        "status": {"$in": status_values}  # Match any of the provided statuses
+        "status": status.value
     }
+    if issue_level:
+        query["issue_level"] = issue_level.value
+    if support_role:
+        query["support_role"] = support_role.value
 
-    # Execute the query
-    cursor = ticket_collection.find(query)
-    tickets: List[Ticket] = []
-    for ticket in cursor:
-        tickets.append(Ticket(**ticket))
-    
-    # Convert results to a list and return
-    return tickets
+    if after:
+        updated_at, ticket_id = after.split(":", 1)
+        query["$or"] = [
+            {"updated_at": {"$lt": int(updated_at)}},
+            {"updated_at": int(updated_at), "id": {"$lt": ticket_id}}
+        ]
+    return query
+
+def ticket_page_cursor(ticket: dict) -> str:
+    return f"{ticket['updated_at']}:{ticket['id']}"
+
+
+@database_error_handler
+def fetch_user_tickets_page(
+    user_id: str,
+    status: TicketStatus,
+    issue_level: IssueLevel = None,
+    support_role: SupportRole = None,
+    after: str = None,
+    limit: int = 50
+) -> list[dict]:
+    """
+    Returns one page of a user's tickets as `TicketResponse` shaped documents, most
+    recently updated first.
+    """
+    query = user_tickets_query(user_id, status, issue_level, support_role, after)
+    cursor = ticket_collection.find(query, TICKET_RESPONSE_PROJECTION).sort(TICKET_LIST_SORT).limit(limit)
+    return list(cursor)
+
+@database_error_handler
+def count_user_tickets(
+    user_id: str,
+    status: TicketStatus,
+    issue_level: IssueLevel = None,
+    support_role: SupportRole = None
+) -> int:
+    return ticket_collection.count_documents(user_tickets_query(user_id, status, issue_level, support_role))
 
 @database_error_handler
 def update_ticket_status(ticket_id: str, status: TicketStatus) -> Ticket:
     query = {"id": str(ticket_id)}
-    update = {"$set": {"status": status.value}}
+    update = {"$set": {"status": status.value, "updated_at": generate_timestamp()}}
     result = ticket_collection.find_one_and_update(query, update, return_document=True)
     if not result:
+        ticket_cache.invalidate(ticket_id)
         return None
     
-    return Ticket(**result)
+    ticket = from_document(Ticket, result)
+    ticket_cache.set(ticket)
+    return ticket
 
 
 
@@ -73,6 +149,9 @@ def update_ticket(id: str , **kwargs) -> Ticket:
     update = {"$set": kwargs}
     result = ticket_collection.find_one_and_update(query, update, return_document=True)
     if not result:
+        ticket_cache.invalidate(id)
         return None
 
-    return Ticket(**result)
+    ticket = from_document(Ticket, result)
+    ticket_cache.set(ticket)
+    return ticket
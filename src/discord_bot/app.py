@@ -3,61 +3,165 @@ import discord
 import os
 import threading
 import asyncio
-import threading
+import concurrent.futures
 import traceback
+import logging
+import time
 
 from .ticket_handler import TicketManager, TranscriptView
 from .message_handler import MessageHandler
-from chat_exporter import export
 
-from database.tickets import update_ticket_status, update_ticket
+from database.async_tickets import update_ticket_status, update_ticket
+from database.async_messages import message_write_buffer, fetch_transcript_messages
+from modules.transcript import build_transcript, transcript_filename
 from socket_manager.send_events import ticket_close_event
 from utils.enums import TicketStatus, SupportRole, IssueLevel
 from utils.settings import guild_settings
 from utils.schema import TicketResponse
 
 from utils.helper import send_disord_error_log
+from utils.metrics import instrument_discord_http, bot_coroutine_wait, bot_provision_queued, bot_provision_in_flight
 
 from discord import option
 
-bot = commands.Bot(intents=discord.Intents.all())
+logger = logging.getLogger("bot")
+
+class TicketBot(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        instrument_discord_http(self.http)
+
+    async def close(self):
+        # Persist buffered messages before the connection and loop go away
+        await message_write_buffer.close()
+        await super().close()
+
+
+bot = TicketBot(intents=discord.Intents.all())
 ticket_manager = TicketManager(bot=bot)
 
 is_running = threading.Event()
 
-bot_lock = threading.Lock()
+# Caps how many coroutines submitted from other threads run on the bot loop at once
+provision_semaphore = asyncio.Semaphore(int(os.getenv("TICKET_PROVISION_CONCURRENCY", 5)))
+provision_timeout = float(os.getenv("TICKET_PROVISION_TIMEOUT", 10))
+provision_stats = {
+    "in_flight": 0,
+    "queued": 0,
+    "finished": 0,
+    "timed_out": 0,
+}
+bot_provision_queued.set_function(lambda: provision_stats["queued"])
+bot_provision_in_flight.set_function(lambda: provision_stats["in_flight"])
+
+
+async def _run_limited(coro):
+    provision_stats["queued"] += 1
+    try:
+        await provision_semaphore.acquire()
+    except BaseException:
+        coro.close()
+        raise
+    finally:
+        provision_stats["queued"] -= 1
+
+    provision_stats["in_flight"] += 1
+    try:
+        return await coro
+    finally:
+        provision_stats["in_flight"] -= 1
+        provision_stats["finished"] += 1
+        provision_semaphore.release()
 
-def bot_run_async_coroutine(coro):
+
+def bot_run_async_coroutine(coro, timeout: float = None):
     """
     Runs a coroutine object on the bot's event loop.
+
+    Many callers can run concurrently, at most `TICKET_PROVISION_CONCURRENCY` at a time and
+    the rest wait on the loop. If the result is not ready within `timeout` the coroutine
+    is cancelled so it does not keep running after the caller gave up.
     
     Args:
         coro (coroutine): The coroutine object to execute.
+        timeout (float): Seconds to wait, defaults to `TICKET_PROVISION_TIMEOUT`.
         
     Returns:
         Any: The result of the coroutine, or raises an exception if it fails.
     """
-    with bot_lock:
-        future = asyncio.run_coroutine_threadsafe(coro, bot.loop)
-        try:
-            return future.result(timeout=10)  # Adjust timeout as needed
-        except Exception as e:
-            raise e
+    start = time.perf_counter()
+    outcome = "error"
+    future = asyncio.run_coroutine_threadsafe(_run_limited(coro), bot.loop)
+    try:
+        result = future.result(timeout=timeout or provision_timeout)
+        outcome = "ok"
+        return result
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        provision_stats["timed_out"] += 1
+        outcome = "timeout"
+        raise
+    finally:
+        bot_coroutine_wait.labels(outcome).observe(time.perf_counter() - start)
+
+
+async def run_provisioning(coro, timeout: float = None):
+    """
+    Awaits a coroutine under the provisioning cap from code already running on the bot loop.
+    """
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await asyncio.wait_for(_run_limited(coro), timeout or provision_timeout)
+        outcome = "ok"
+        return result
+    except asyncio.TimeoutError:
+        provision_stats["timed_out"] += 1
+        outcome = "timeout"
+        raise
+    finally:
+        bot_coroutine_wait.labels(outcome).observe(time.perf_counter() - start)
 
 
-    
+def get_provision_stats() -> dict:
+    return dict(provision_stats)
 
 
 @bot.event
 async def on_ready():
     global is_running
-    print(f"Succesfully logged in as {bot.user}")
+    logger.info("Logged in", extra={"user": str(bot.user)})
     ticket_manager.initialize()
     is_running.set()
+    asyncio.create_task(ticket_manager.channel_pool.start())
     
     bot.add_view(TranscriptView())
 
 
+# Keep the ticket category capacity index in sync with the guild
+@bot.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    if isinstance(channel, discord.TextChannel) and channel.category_id:
+        ticket_manager.on_channel_added(channel.category_id)
+
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    if isinstance(channel, discord.TextChannel) and channel.category_id:
+        ticket_manager.on_channel_removed(channel.category_id)
+
+
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    if not isinstance(after, discord.TextChannel) or before.category_id == after.category_id:
+        return
+
+    if before.category_id:
+        ticket_manager.on_channel_removed(before.category_id)
+    if after.category_id:
+        ticket_manager.on_channel_added(after.category_id)
+
+
 @bot.slash_command(name="delete_ticket")
 async def delete_ticket(ctx: discord.ApplicationContext, reason: str):
     # Remove the first query to fetch the ticket
@@ -66,7 +170,7 @@ async def delete_ticket(ctx: discord.ApplicationContext, reason: str):
     #     await ctx.respond(f"This channel is not a ticket channel.", ephemeral=True)
     
     # Update the ticket status and get the updated ticket
-    ticket = update_ticket_status(ctx.interaction.channel_id, TicketStatus.CLOSED)
+    ticket = await update_ticket_status(ctx.interaction.channel_id, TicketStatus.CLOSED)
     if not ticket:
         await ctx.respond(f"Failed to update ticket status in database", ephemeral=True)
         return
@@ -75,8 +179,11 @@ async def delete_ticket(ctx: discord.ApplicationContext, reason: str):
         
     await ctx.respond(embed=discord.Embed(title="Ticket Closed", description="This ticket has been closed deleting..."))
     
-    transcript_file = await export(ctx.interaction.channel)
-    await ticket_manager.send_transcript(ticket, transcript_file, reason)
+    # Render from the stored messages in a worker process instead of re-reading the channel history
+    await message_write_buffer.flush()
+    messages = await fetch_transcript_messages(ticket.id)
+    transcript = await build_transcript(ticket.model_dump(), messages)
+    await ticket_manager.send_transcript(ticket, transcript, transcript_filename(ticket.id), reason)
     await ctx.interaction.channel.delete()
 
 
@@ -116,7 +223,7 @@ async def assign_role(
         return await ctx.respond("Invalid issue level selected.", ephemeral=True)
 
     # Update the ticket in the database
-    ticket = update_ticket(
+    ticket = await update_ticket(
         id=str(ctx.interaction.channel_id),
         support_role=support_role,
         issue_level=issue_level_enum.value
@@ -132,7 +239,15 @@ async def assign_role(
     elif issue_level_enum == IssueLevel.CRITICAL:
         await ctx.interaction.channel.edit(category=ticket_manager.critical_category)
     else:
-        await ctx.interaction.channel.edit(category=await ticket_manager.get_ticket_category())
+        category = await ticket_manager.get_ticket_category()
+        if category.id == ctx.interaction.channel.category_id:
+            ticket_manager.release_category_slot(category.id)
+        else:
+            try:
+                await ctx.interaction.channel.edit(category=category)
+            except BaseException:
+                ticket_manager.release_category_slot(category.id)
+                raise
 
     role_mention = {
         SupportRole.ADMIN: guild_settings.admin_role_id,
@@ -184,8 +299,8 @@ async def on_application_command_error(ctx: discord.ApplicationContext, error: E
     except Exception as e:
         traceback_details = traceback.format_exc()
 
-    print(traceback_details)
-    await asyncio.to_thread(send_disord_error_log, ctx, "Application Command Error", traceback_details, error)    
+    logger.error("Application command error", extra={"command": str(ctx.command) if ctx else None, "traceback": traceback_details})
+    send_disord_error_log(ctx, "Application Command Error", traceback_details, error)
 
 
 bot.add_cog(MessageHandler(bot))
@@ -200,3 +315,20 @@ def run_bot():
     
     threading.Thread(target=run, daemon=True).start()
     is_running.wait()
+
+
+async def start_bot_async():
+    """
+    Starts the bot as a task on the running loop, which must be `bot.loop`, and waits until it is ready.
+    """
+    BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
+    if BOT_TOKEN is None:
+        raise ValueError("BOT_TOKEN is not set in the environment variables")
+
+    task = asyncio.create_task(bot.start(BOT_TOKEN))
+    while not is_running.is_set():
+        if task.done():
+            # Surface login errors instead of waiting forever
+            task.result()
+        await asyncio.sleep(0.1)
+    return task
@@ -2,12 +2,11 @@ from discord.ext import commands
 
 from utils.schema import Ticket, Message
 
-from database.tickets import fetch_ticket
-from database.messages import insert_message, update_message_content, delete_message
+from database.async_tickets import fetch_ticket
+from database.async_messages import message_write_buffer, update_message_content, delete_message
 
 from socket_manager.send_events import send_message_event, message_edit_event, message_delete_event
 
-import asyncio
 import discord
 
 from utils.enums import TicketStatus
@@ -16,7 +15,8 @@ from utils.settings import guild_settings
 
 import logging
 
-logger = logging.getLogger("bot_logger")
+# Per message lines are DEBUG, sample them with LOG_SAMPLING=bot.messages=<rate>
+logger = logging.getLogger("bot.messages")
 
 def filter_message(message: discord.Message):
     if message.author.bot or message.mentions:
@@ -25,13 +25,13 @@ def filter_message(message: discord.Message):
     return True
 
 async def fetch_active_ticket(channel_id: str) -> Ticket:
-    ticket: Ticket = await asyncio.to_thread(fetch_ticket, channel_id)
+    ticket: Ticket = await fetch_ticket(channel_id)
     if not ticket:
-        print(f"Ticket not found for channel ID: {channel_id}")
+        logger.debug("Ticket not found for channel", extra={"channel_id": channel_id})
         return None
     
     if ticket.status != TicketStatus.ACTIVE:
-        print(f"Ticket {ticket.id} is not active")
+        logger.debug("Ticket is not active", extra={"ticket_id": ticket.id})
         return None
     return ticket
 
@@ -42,7 +42,7 @@ class MessageHandler(commands.Cog):
     @commands.Cog.listener()
     async def on_message(self, discord_message: discord.Message):
         if not filter_message(discord_message):
-            print("Message filtered out")
+            logger.debug("Message filtered out", extra={"message_id": discord_message.id})
             return
 
         ticket = await fetch_active_ticket(str(discord_message.channel.id))
@@ -50,7 +50,7 @@ class MessageHandler(commands.Cog):
             return
 
         if not discord_message.content:
-            print("Message has no content")
+            logger.debug("Message has no content", extra={"message_id": discord_message.id})
             return
 
         message = Message(
@@ -61,10 +61,10 @@ class MessageHandler(commands.Cog):
             content=discord_message.content,
             attachments=[attachment.url for attachment in discord_message.attachments]
         )
-        await asyncio.to_thread(insert_message, message)
-        await asyncio.to_thread(send_message_event,user_id=ticket.user_id, message=message)
+        await message_write_buffer.add(message)
+        send_message_event(user_id=ticket.user_id, message=message)
 
-        print(f"Message sent: {message.content}")
+        logger.debug("Message stored", extra={"message_id": message.id, "ticket_id": ticket.id})
         if guild_settings.replay_to_success_message:
             await discord_message.reply("Message sent successfully!..", delete_after=5)
 
@@ -79,17 +79,20 @@ class MessageHandler(commands.Cog):
             return
 
         if not after.content:
-            print("Edited message has no content")
+            logger.debug("Edited message has no content", extra={"message_id": before.id})
             return
 
-        message = await asyncio.to_thread(update_message_content, str(before.channel.id), str(before.id), after.content)
+        if message_write_buffer.is_pending(before.id):
+            await message_write_buffer.flush()
+
+        message = await update_message_content(str(before.channel.id), str(before.id), after.content)
         if not message:
-            print("Message not found, failed to edit")
+            logger.warning("Message not found, failed to edit", extra={"message_id": before.id, "ticket_id": ticket.id})
             return
 
-        await asyncio.to_thread(message_edit_event,user_id=ticket.user_id, message=message)
+        message_edit_event(user_id=ticket.user_id, message=message)
 
-        print(f"Message edited: {message.content}")
+        logger.debug("Message edited", extra={"message_id": message.id, "ticket_id": ticket.id})
         await after.reply("Message edited successfully!..", delete_after=5)
 
     @commands.Cog.listener()
@@ -101,11 +104,15 @@ class MessageHandler(commands.Cog):
         if not ticket:
             return
 
-        message = await asyncio.to_thread(delete_message, str(message.id))
+        if message_write_buffer.is_pending(message.id):
+            await message_write_buffer.flush()
+
+        message_id = str(message.id)
+        message = await delete_message(ticket.id, message_id)
         if not message:
-            print("Message not found, failed to delete")
+            logger.warning("Message not found, failed to delete", extra={"message_id": message_id, "ticket_id": ticket.id})
             return
 
-        print(f"Message deleted: {message.content}")
-        await asyncio.to_thread(message_delete_event, user_id=ticket.user_id, message=message)
+        logger.debug("Message deleted", extra={"message_id": message.id, "ticket_id": ticket.id})
+        message_delete_event(user_id=ticket.user_id, message=message)
 
@@ -5,9 +5,23 @@ from utils.settings import guild_settings
 import chat_exporter
 import discord
 
+from collections import deque
+
+import asyncio
+import logging
+import time
 import os
 import io
 
+logger = logging.getLogger("bot.tickets")
+
+# Discord allows at most 50 channels in a category
+CATEGORY_CHANNEL_LIMIT = 50
+POOLED_CHANNEL_NAME = "pooled-ticket"
+# Only pooled channels carry this topic, ticket topics always read "Ticket for <username>",
+# so a user named "pooled" can never have their channel adopted into the pool
+POOLED_CHANNEL_TOPIC = "[ticket-pool] Reserved, not yet assigned to a ticket"
+
 class TranscriptView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -16,27 +30,181 @@ class TranscriptView(discord.ui.View):
     
     @discord.ui.button(label="View Transcript", style=discord.ButtonStyle.primary, custom_id="transcript_button")
     async def send_transcript(self, button: discord.ui.Button, interaction: discord.Interaction):
-        try:
-            file_link = await chat_exporter.link(interaction.message)
-        except IndexError:
+        if not interaction.message.attachments:
             return await interaction.response.send_message("No transcript found.", ephemeral=True)
+
+        attachment = interaction.message.attachments[0]
+        if attachment.filename.endswith(".html"):
+            file_link = await chat_exporter.link(interaction.message)
+        else:
+            # Compressed transcripts can't be viewed online, hand out the download link
+            file_link = attachment.url
         
         await interaction.response.send_message(f"{file_link}", ephemeral=True)
 
+class TicketChannelPool:
+    """
+    Hidden, pre-created ticket channels that already have a webhook attached.
+
+    The pool is sized from the number of tickets claimed in the last `lead_time` seconds,
+    bounded by `min_size` and `max_size`, and refilled in the background after every claim.
+    Pooled channels survive restarts, they are adopted again on `start` by their name and
+    `POOLED_CHANNEL_TOPIC`.
+    """
+    def __init__(self, manager: "TicketManager", enabled: bool = False, min_size: int = 2, max_size: int = 10, lead_time: float = 600) -> None:
+        self.manager = manager
+        self.enabled = enabled
+        self.min_size = min_size
+        self.max_size = max_size
+        self.lead_time = lead_time
+
+        self._ready: deque[tuple[discord.TextChannel, discord.Webhook]] = deque()
+        self._claims: deque[float] = deque()
+        self._refill_task: asyncio.Task = None
+        self._give_back_tasks: set[asyncio.Task] = set()
+        self._started = False
+
+
+    async def start(self) -> None:
+        if not self.enabled or self._started:
+            return
+        self._started = True
+
+        for category_id in self.manager.category_ids:
+            category = self.manager.guild.get_channel(category_id)
+            if not category:
+                continue
+
+            for channel in category.text_channels:
+                if channel.name != POOLED_CHANNEL_NAME or channel.topic != POOLED_CHANNEL_TOPIC:
+                    continue
+
+                webhooks = await channel.webhooks()
+                webhook = next((webhook for webhook in webhooks if webhook.user and webhook.user.id == self.manager.guild.me.id), None)
+                if webhook is None:
+                    webhook = await channel.create_webhook(name="Ticket", reason="Pooled ticket webhook")
+                self._ready.append((channel, webhook))
+
+        self.refill()
+
+    def claim(self) -> tuple[discord.TextChannel, discord.Webhook]:
+        """Takes a ready channel and its webhook out of the pool, None when the pool is empty or disabled."""
+        if not self.enabled:
+            return None
+
+        self._claims.append(time.monotonic())
+        pooled = None
+        while self._ready:
+            channel, webhook = self._ready.popleft()
+            # Skip channels that were deleted by hand while pooled
+            if self.manager.guild.get_channel(channel.id):
+                pooled = (channel, webhook)
+                break
+
+        self.refill()
+        return pooled
+
+    def target_size(self) -> int:
+        cutoff = time.monotonic() - self.lead_time
+        while self._claims and self._claims[0] < cutoff:
+            self._claims.popleft()
+
+        return max(self.min_size, min(self.max_size, len(self._claims)))
+
+    def refill(self) -> None:
+        if self._started and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self._refill())
+
+    def give_back(self, channel: discord.TextChannel, webhook: discord.Webhook, announced: bool = False) -> None:
+        """
+        Returns a claimed channel whose ticket was not created, e.g. when the caller timed out.
+        It is hidden and pooled again in the background, or deleted once the ticket was
+        `announced` in it.
+        """
+        task = asyncio.create_task(self._give_back(channel, webhook, announced))
+        self._give_back_tasks.add(task)
+        task.add_done_callback(self._give_back_tasks.discard)
+
+
+    async def _refill(self) -> None:
+        try:
+            while len(self._ready) < self.target_size():
+                self._ready.append(await self._create())
+        except Exception as e:
+            logger.warning("Failed to refill the ticket channel pool", exc_info=e)
+
+    async def _give_back(self, channel: discord.TextChannel, webhook: discord.Webhook, announced: bool) -> None:
+        try:
+            if announced:
+                await channel.delete(reason="Ticket creation was cancelled")
+                return
+
+            await channel.edit(name=POOLED_CHANNEL_NAME, topic=POOLED_CHANNEL_TOPIC, overwrites=self._hidden_overwrites())
+            await webhook.edit(name="Ticket", reason="Pooled ticket webhook")
+            self._ready.appendleft((channel, webhook))
+        except Exception as e:
+            logger.warning("Failed to give back a pooled ticket channel", exc_info=e, extra={"channel_id": channel.id})
+
+    def _hidden_overwrites(self) -> dict:
+        guild = self.manager.guild
+        return {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, manage_channels=True, manage_webhooks=True),
+        }
+
+    async def _create(self) -> tuple[discord.TextChannel, discord.Webhook]:
+        category = await self.manager.get_ticket_category()
+        try:
+            channel = await category.create_text_channel(
+                name=POOLED_CHANNEL_NAME,
+                topic=POOLED_CHANNEL_TOPIC,
+                overwrites=self._hidden_overwrites()
+            )
+        except BaseException:
+            self.manager.release_category_slot(category.id)
+            raise
+
+        webhook = await channel.create_webhook(name="Ticket", reason="Pooled ticket webhook")
+        return channel, webhook
+
+
 class TicketManager:
     def __init__(self, bot: Bot):
         self.bot = bot
         self.category_ids = []
         self.guild = None
 
+        # Free text channel slots per ticket category, kept up to date from gateway events
+        self.category_capacity: dict[int, int] = {}
+        # Slots handed out by `get_ticket_category` whose channel has not shown up yet
+        self.reserved_slots: dict[int, int] = {}
+        self.spare_watermark = int(os.getenv("TICKET_CATEGORY_WATERMARK", 10))
+        self._clone_task: asyncio.Task = None
+        self._initialized = False
+
+        self.channel_pool = TicketChannelPool(
+            self,
+            enabled=os.getenv("TICKET_CHANNEL_POOL", "false").lower() == "true",
+            min_size=int(os.getenv("TICKET_CHANNEL_POOL_MIN", 2)),
+            max_size=int(os.getenv("TICKET_CHANNEL_POOL_MAX", 10))
+        )
 
-    def append_category_id(self, category_id: int):
+
+    async def append_category_id(self, category_id: int):
         self.category_ids.append(category_id)
-        guild_settings.update_settings({ 
-            "ticket_opening_categories": self.category_ids
-         })
+        # `category_ids` is the settings list itself so there is nothing to re-read
+        await asyncio.to_thread(
+            guild_settings.update_settings,
+            {"ticket_opening_categories": self.category_ids},
+            reload=False
+        )
 
     def initialize(self) -> None:
+        """
+        Resolves the guild and its channels, called on every `on_ready`. A reconnect replaces
+        the cached guild objects, but the capacity index is only built once: rebuilding it
+        would drop the reservations of tickets being created.
+        """
         guild_id = os.getenv("GUILD_ID")
         if not guild_id:
             raise ValueError("GUILD_ID environment variable is not set.")
@@ -49,8 +217,6 @@ class TicketManager:
         if not self.support_team_role:
             raise ValueError("Support team role not found in the guild.")
         
-        self.category_ids = guild_settings.ticket_opening_categories
-        
         self.transcript_channel = self.guild.get_channel(int(os.getenv("TRANSCRIPT_CHANNEL_ID")))
         if not self.transcript_channel:
             raise ValueError("Transcript channel not found in the guild.")
@@ -63,33 +229,96 @@ class TicketManager:
         if not self.urgent_category:
             raise ValueError("Urgent ticket category not found in the guild.")
 
-        
-        
+        if self._initialized:
+            return
 
-        
+        self.category_ids = guild_settings.ticket_opening_categories
+        self.build_capacity_index()
+        self._initialized = True
+
+
+    def build_capacity_index(self) -> None:
+        self.category_capacity = {}
+        self.reserved_slots = {}
+        for category_id in self.category_ids:
+            category = self.guild.get_channel(category_id)
+            if category:
+                self.category_capacity[category_id] = CATEGORY_CHANNEL_LIMIT - len(category.text_channels)
+
+    def on_channel_added(self, category_id: int) -> None:
+        """Call when a text channel is created in or moved into a category."""
+        if category_id not in self.category_capacity:
+            return
+
+        if self.reserved_slots.get(category_id):
+            self.reserved_slots[category_id] -= 1
+        else:
+            self.category_capacity[category_id] -= 1
+
+    def on_channel_removed(self, category_id: int) -> None:
+        """Call when a text channel is deleted from or moved out of a category."""
+        if category_id in self.category_capacity:
+            self.category_capacity[category_id] += 1
+
+    def release_category_slot(self, category_id: int) -> None:
+        """Gives back a slot from `get_ticket_category` when the channel was never created or moved."""
+        if self.reserved_slots.get(category_id):
+            self.reserved_slots[category_id] -= 1
+            self.category_capacity[category_id] += 1
+
+    def free_slots(self) -> int:
+        return sum(max(0, free) for free in self.category_capacity.values())
 
 
     async def get_ticket_category(self):
+        """
+        Reserves a slot in a ticket category that has room.
+
+        The reservation is consumed by the channel create/move event, call `release_category_slot`
+        if the channel ends up not being created. A spare category is cloned in the background
+        once free slots drop below `TICKET_CATEGORY_WATERMARK`.
+        """
         if not self.guild:
             raise ValueError("Guild not initialized. Call `initialize` first.")
         
-        for category_id in self.category_ids:
-            category = self.guild.get_channel(category_id)
-            if category and len(category.text_channels) < 50:
-                return category
-        
-        # Clone a category if all categories are full
+        while True:
+            # No awaits between picking and reserving, so concurrent callers never share a slot
+            for category_id, free in self.category_capacity.items():
+                if free > 0:
+                    self.category_capacity[category_id] -= 1
+                    self.reserved_slots[category_id] = self.reserved_slots.get(category_id, 0) + 1
+                    self._ensure_spare_category()
+                    return self.guild.get_channel(category_id)
+            
+            # Every category is full, wait for the single in flight clone. Shielded so a caller
+            # cancelled by the provisioning timeout does not cancel the clone for everyone else
+            await asyncio.shield(self._ensure_spare_category(force=True))
+
+    def _ensure_spare_category(self, force: bool = False) -> asyncio.Future:
+        if self._clone_task is None or self._clone_task.done():
+            if not force and self.free_slots() >= self.spare_watermark:
+                return None
+            self._clone_task = asyncio.create_task(self._clone_category())
+            self._clone_task.add_done_callback(self._on_clone_done)
+        return self._clone_task
+
+    def _on_clone_done(self, task: asyncio.Task) -> None:
+        # Background clones nobody awaits would otherwise fail silently
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Failed to clone a ticket category", exc_info=task.exception())
+
+    async def _clone_category(self) -> None:
         category_to_clone: CategoryChannel = self.guild.get_channel(self.category_ids[0])
         if not category_to_clone:
             raise ValueError("No valid category found to clone.")
         
         category = await category_to_clone.clone(name=f"Ticket Category - {len(self.category_ids) + 1}")
-        category.move(category_to_clone.position + 1)
+        await category.edit(position=category_to_clone.position + 1)
 
-        self.append_category_id(category.id)
-        return category
+        self.category_capacity[category.id] = CATEGORY_CHANNEL_LIMIT - len(category.text_channels)
+        await self.append_category_id(category.id)
     
-    async def send_transcript(self, ticket: Ticket, transcript_str: str, reason: str = None):
+    async def send_transcript(self, ticket: Ticket, transcript: bytes, filename: str, reason: str = None):
         embed = Embed(
             title="Ticket Transcript",
         )
@@ -110,8 +339,8 @@ class TicketManager:
         )
         embed.set_footer(text=self.guild.name)
         transcript_file = discord.File(
-        io.BytesIO(transcript_str.encode()),
-        filename=f"transcript-{ticket.id}.html",
+        io.BytesIO(transcript),
+        filename=filename,
     )
         await self.transcript_channel.send(embed=embed, file=transcript_file, view=TranscriptView())
 
@@ -123,12 +352,6 @@ class TicketManager:
         if not self.guild:
             raise ValueError("Guild not initialized. Call `initialize` first.")
 
-        category = await self.get_ticket_category()
-        channel = await category.create_text_channel(
-            name=f"{user.username}-ticket",
-            topic=f"Ticket for {user.username}",
-        )
-
         embed = Embed(
             title="Ticket Information",
             description=f"Title: ``{title}``\nDescription: ``{description}``"
@@ -142,13 +365,45 @@ class TicketManager:
             name="Ticket System",
             icon_url=self.guild.icon.url if self.guild.icon else None
         )
+        content = f"{self.support_team_role.mention} A new ticket has been opened. Please review the details below."
+
+        pooled = self.channel_pool.claim()
+        if pooled:
+            channel, webhook = pooled
+            announced = False
+            try:
+                # Reveal first so the support team can see the channel when the mention arrives
+                await channel.edit(
+                    name=f"{user.username}-ticket",
+                    topic=f"Ticket for {user.username}",
+                    sync_permissions=True
+                )
+                announced = True
+                await asyncio.gather(
+                    channel.send(content=content, embed=embed),
+                    webhook.edit(name=user.username, reason="Ticket webhook")
+                )
+            except BaseException:
+                # Also on cancellation by the provisioning timeout, the channel would be lost
+                self.channel_pool.give_back(channel, webhook, announced=announced)
+                raise
+            return channel.id, webhook.url
 
+        category = await self.get_ticket_category()
+        try:
+            channel = await category.create_text_channel(
+                name=f"{user.username}-ticket",
+                topic=f"Ticket for {user.username}",
+            )
+        except BaseException:
+            self.release_category_slot(category.id)
+            raise
 
         await channel.send(
-            content=f"{self.support_team_role.mention} A new ticket has been opened. Please review the details below.",
+            content=content,
             embed=embed
         )
         
         webhook = await channel.create_webhook(name=user.username, reason="Ticket webhook")
 
-        return channel.id, webhook.url
\ No newline at end of file
+        return channel.id, webhook.url
@@ -0,0 +1,58 @@
+from functools import wraps
+from quart import request
+from limits import parse
+from limits.aio.storage import MemoryStorage
+from limits.aio.strategies import FixedWindowRateLimiter
+from pydantic import ValidationError
+
+from utils.exceptions import AuthenticationError, InternalServerError, RateLimitError
+from utils.schema import TicketUser
+from modules.auth import authenticator
+
+
+# Quart counterparts of `modules.decorator` and the Flask-Limiter limits, used by the ASGI server
+
+rate_limiter = FixedWindowRateLimiter(MemoryStorage())
+
+
+def async_ticket_user_required(func):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = request.headers.get('Authorization', "")
+        if not token:
+            raise AuthenticationError("Authorization header is missing")
+
+        try:
+            ticket_user: TicketUser = authenticator.authenticate(token)
+        except ValidationError:
+            raise InternalServerError("An unexpected error occurred. Invalid user data in token")
+
+        request.user_id = ticket_user.id
+
+        return await func(ticket_user, *args, **kwargs)
+    return wrapper
+
+
+def rate_limit_key() -> str:
+    user_id = getattr(request, "user_id", None)
+    return str(user_id) if user_id else request.remote_addr
+
+
+async def check_rate_limit(limit: str, scope: str) -> None:
+    if not await rate_limiter.hit(parse(limit), scope, rate_limit_key()):
+        raise RateLimitError(limit)
+
+
+def async_rate_limit(limit: str, exempt_when=None):
+    """
+    Limits a route per user (or per IP before authentication), e.g. `"3 per minute"`.
+    Requests for which `exempt_when()` is true are not counted, like Flask-Limiter's option.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            if exempt_when is None or not exempt_when():
+                await check_rate_limit(limit, func.__name__)
+            return await func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,9 +1,17 @@
 
 import jwt
 import time
+import hashlib
+import threading
+import os
 
+from cachetools import LRUCache
+from dotenv import load_dotenv
 
 from utils.exceptions import AuthenticationError
+from utils.schema import TicketUser
+
+load_dotenv()
 
 class JWT:
     def __init__(self, encryption_key: str) -> None:
@@ -24,4 +32,87 @@ class JWT:
         except Exception as e:
             raise AuthenticationError
 
-    
\ No newline at end of file
+
+class Authenticator:
+    """
+    Verifies tokens and returns their `TicketUser`, remembering verified tokens in a bounded LRU.
+
+    Entries are keyed by the SHA-256 digest of the token and stop being served once the
+    token's `exp` has passed. `revoke` rejects a token even if it is still valid.
+    """
+    def __init__(self, jwt: JWT, maxsize: int = 10000) -> None:
+        self.jwt = jwt
+        self._verified = LRUCache(maxsize=maxsize)
+        self._revoked: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+
+    def authenticate(self, token: str) -> TicketUser:
+        """
+        Raises:
+            AuthenticationError: The token is invalid, expired or revoked.
+            ValidationError: The token payload is not a valid `TicketUser`.
+        """
+        digest = self._digest(token)
+        now = time.time()
+        with self._lock:
+            if digest in self._revoked:
+                raise AuthenticationError("Token has been revoked")
+
+            cached = self._verified.get(digest)
+            if cached is not None:
+                user, expire_time = cached
+                if expire_time is None or expire_time > now:
+                    return user
+                del self._verified[digest]
+
+        user_data = self.jwt.decrypt(token)
+        user = TicketUser(**user_data)
+
+        with self._lock:
+            self._verified[digest] = (user, user_data.get("exp"))
+        return user
+
+    def revoke(self, token: str) -> None:
+        """Rejects the token from now on, the revocation is kept until the token expires."""
+        digest = self._digest(token)
+        try:
+            expire_time = self.jwt.decrypt(token).get("exp")
+        except AuthenticationError:
+            # Already rejected by the signature or `exp` check, nothing to remember
+            expire_time = None
+            revoke = False
+        else:
+            revoke = True
+
+        with self._lock:
+            self._verified.pop(digest, None)
+            if revoke:
+                self._revoked[digest] = expire_time or float("inf")
+            self._purge_revoked()
+
+    def revoke_user(self, user_id: str) -> None:
+        """Drops every cached token of a user so they are verified again on the next request."""
+        with self._lock:
+            for digest in [digest for digest, (user, _) in self._verified.items() if user.id == str(user_id)]:
+                del self._verified[digest]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached": len(self._verified), "revoked": len(self._revoked)}
+
+
+    def _purge_revoked(self) -> None:
+        now = time.time()
+        for digest in [digest for digest, expire_time in self._revoked.items() if expire_time <= now]:
+            del self._revoked[digest]
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+
+authenticator = Authenticator(
+    JWT(encryption_key=os.getenv('JWT_SECRET_KEY')),
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", 10000))
+)
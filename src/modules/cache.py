@@ -0,0 +1,109 @@
+from cachetools import TTLCache
+
+import threading
+import asyncio
+import logging
+import uuid
+import json
+
+
+logger = logging.getLogger("cache")
+
+
+class TicketCache:
+    """
+    Thread safe TTL + LRU cache of `Ticket` models keyed by ticket id.
+
+    When `redis_url` is given every invalidation is published on `channel`, and
+    invalidations published by other worker processes are applied locally.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60, redis_url: str = None, channel: str = "ticket_cache") -> None:
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        self._origin = uuid.uuid4().hex
+        self._channel = channel
+        self._redis = None
+        if redis_url:
+            self._start_broadcast(redis_url)
+
+
+    def get(self, ticket_id: str):
+        with self._lock:
+            ticket = self._cache.get(str(ticket_id))
+            if ticket is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return ticket
+
+    def set(self, ticket, broadcast: bool = True) -> None:
+        """
+        Stores a ticket, `broadcast` should only be disabled when the ticket was just read from the database.
+        """
+        with self._lock:
+            self._cache[str(ticket.id)] = ticket
+        if broadcast:
+            self._publish(ticket.id)
+
+    def invalidate(self, ticket_id: str) -> None:
+        self._drop(ticket_id)
+        self._publish(ticket_id)
+
+    async def set_async(self, ticket, broadcast: bool = True) -> None:
+        """`set` for the event loop, the invalidation is published from a worker thread."""
+        self.set(ticket, broadcast=False)
+        if broadcast and self._redis is not None:
+            await asyncio.to_thread(self._publish, ticket.id)
+
+    async def invalidate_async(self, ticket_id: str) -> None:
+        self._drop(ticket_id)
+        if self._redis is not None:
+            await asyncio.to_thread(self._publish, ticket_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": self._cache.maxsize,
+            }
+
+
+    def _drop(self, ticket_id: str) -> None:
+        with self._lock:
+            self._cache.pop(str(ticket_id), None)
+
+    def _publish(self, ticket_id: str) -> None:
+        if self._redis is None:
+            return
+
+        try:
+            self._redis.publish(self._channel, json.dumps({"origin": self._origin, "id": str(ticket_id)}))
+        except Exception as e:
+            # Peers fall back to the TTL if an invalidation is lost
+            logger.warning("Failed to broadcast ticket cache invalidation", exc_info=e)
+
+    def _start_broadcast(self, redis_url: str) -> None:
+        import redis
+
+        self._redis = redis.Redis.from_url(redis_url)
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self._channel: self._on_broadcast})
+        pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _on_broadcast(self, message: dict) -> None:
+        try:
+            data = json.loads(message["data"])
+        except (KeyError, ValueError):
+            return
+
+        if data.get("origin") != self._origin:
+            self._drop(data.get("id"))
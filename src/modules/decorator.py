@@ -6,14 +6,13 @@ from utils.exceptions import AuthenticationError, InternalServerError, DatabaseE
 from utils.schema import TicketUser
 
 from pydantic import ValidationError
-from modules.auth import JWT
+from modules.auth import authenticator
+from utils.metrics import db_query_duration, query_name
 
-import os
+import time
 
 load_dotenv()
 
-jwt_enc = JWT(encryption_key=os.getenv('JWT_SECRET_KEY'))
-
 def ticket_user_required(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -21,9 +20,8 @@ def ticket_user_required(func):
         if not token:
             raise AuthenticationError("Authorization header is missing")
 
-        user_data = jwt_enc.decrypt(token)
         try:
-            ticket_user = TicketUser(**user_data)
+            ticket_user: TicketUser = authenticator.authenticate(token)
         except ValidationError:
             raise InternalServerError("An unexpected error occurred. Invalid user data in token")
 
@@ -35,10 +33,32 @@ def ticket_user_required(func):
 
 
 def database_error_handler(func):
+    histogram = db_query_duration.labels(query_name(func))
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
+        start = time.perf_counter()
         try:
             return func(*args, **kwargs)
         except ValidationError as e:
             raise DatabaseError(f"An unexpected error occurred")
+        finally:
+            histogram.observe(time.perf_counter() - start)
         
-    return wrapper
\ No newline at end of file
+    return wrapper
+
+
+def async_database_error_handler(func):
+    histogram = db_query_duration.labels(query_name(func))
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except ValidationError as e:
+            raise DatabaseError(f"An unexpected error occurred")
+        finally:
+            histogram.observe(time.perf_counter() - start)
+        
+    return wrapper
@@ -0,0 +1,83 @@
+from database.delivery_queue import claim_delivery, complete_delivery, retry_delivery
+from database.messages import update_message_delivery_status
+from socket_manager.send_events import message_delivered_event, message_failed_event
+from utils.enums import DeliveryStatus
+from utils.helper import send_webhook_message
+
+import threading
+import logging
+import os
+
+
+logger = logging.getLogger("delivery")
+
+
+class DeliveryWorkerPool:
+    """
+    Background workers that drain the `delivery_queue` collection and post messages to the ticket webhooks.
+
+    Failed deliveries are retried with exponential backoff, after `max_attempts` the message is
+    marked as FAILED. The outcome is pushed to the ticket owner over the socket.
+    """
+    def __init__(self, enabled: bool = False, workers: int = 4, max_attempts: int = 5, poll_interval: float = 1.0) -> None:
+        self.enabled = enabled
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+
+        self._wakeup = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+
+    def start(self) -> None:
+        if not self.enabled or self._threads:
+            return
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"delivery-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self) -> None:
+        """Wakes an idle worker, call after enqueueing a delivery."""
+        self._wakeup.set()
+
+
+    def _run(self) -> None:
+        while True:
+            try:
+                job = claim_delivery()
+                if job:
+                    self._deliver(job)
+                    continue
+            except Exception:
+                logger.exception("Delivery worker error")
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _deliver(self, job: dict) -> None:
+        success = send_webhook_message(url=job["webhook_url"], content=job["content"])
+        if success is True:
+            complete_delivery(job["id"])
+            message = update_message_delivery_status(job["ticket_id"], job["id"], DeliveryStatus.DELIVERED)
+            if message:
+                message_delivered_event(job["user_id"], message)
+            return
+
+        attempts = job["attempts"] + 1
+        if attempts < self.max_attempts:
+            retry_delivery(job["id"], delay=min(60, 2 ** attempts))
+            return
+
+        complete_delivery(job["id"])
+        message = update_message_delivery_status(job["ticket_id"], job["id"], DeliveryStatus.FAILED)
+        if message:
+            message_failed_event(job["user_id"], message)
+
+
+delivery_pool = DeliveryWorkerPool(
+    enabled=os.getenv("MESSAGE_DELIVERY_MODE", "sync").lower() == "async",
+    workers=int(os.getenv("DELIVERY_WORKERS", 4)),
+    max_attempts=int(os.getenv("DELIVERY_MAX_ATTEMPTS", 5))
+)
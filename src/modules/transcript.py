@@ -0,0 +1,122 @@
+from datetime import datetime, timezone
+from html import escape
+
+import asyncio
+import pickle
+import gzip
+import sys
+import io
+import os
+
+
+TRANSCRIPT_COMPRESSION = os.getenv("TRANSCRIPT_COMPRESSION", "gzip").lower()
+
+FILE_EXTENSIONS = {
+    "none": "html",
+    "gzip": "html.gz",
+    "zstd": "html.zst",
+}
+
+# Directory holding the `modules` package, workers run this file from it with `-m`
+SOURCE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_render_slots = asyncio.Semaphore(int(os.getenv("TRANSCRIPT_WORKERS", 2)))
+
+
+def _open_writer(buffer: io.BytesIO, compression: str):
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=buffer, mode="wb")
+
+    if compression == "zstd":
+        # Optional dependency, only needed when TRANSCRIPT_COMPRESSION=zstd
+        import zstandard
+        return zstandard.ZstdCompressor().stream_writer(buffer, closefd=False)
+
+    return buffer
+
+
+def _format_timestamp(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime("%Y-%m-%d %H:%M:%S UTC")
+
+
+def render_transcript(ticket: dict, messages: list, compression: str = "gzip") -> bytes:
+    """
+    Renders a ticket transcript as HTML and returns it compressed with `compression`.
+
+    Runs in a worker process so it only takes plain dicts. The HTML is written message
+    by message into the compressor, the full page is never held uncompressed.
+    """
+    buffer = io.BytesIO()
+    writer = _open_writer(buffer, compression)
+
+    def write(text: str):
+        writer.write(text.encode())
+
+    write(
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>Transcript {escape(str(ticket['id']))}</title>"
+        "<style>body{font-family:sans-serif;background:#313338;color:#dbdee1;margin:2em}"
+        ".message{margin:0 0 1em}.author{font-weight:bold;color:#fff}.time{color:#949ba4;font-size:.8em;margin-left:.5em}"
+        ".content{white-space:pre-wrap}a{color:#00a8fc}</style></head><body>"
+    )
+    write(
+        f"<h1>{escape(str(ticket.get('topic') or 'Ticket'))}</h1>"
+        f"<p>{escape(str(ticket.get('description') or ''))}</p>"
+        f"<p>Opened by {escape(str(ticket.get('username')))} ({escape(str(ticket.get('user_id')))})"
+        f" on {_format_timestamp(ticket['created_at'])}</p><hr>"
+    )
+
+    for message in messages:
+        attachments = "".join(
+            f"<div><a href=\"{escape(url)}\">{escape(url)}</a></div>"
+            for url in message.get("attachments", [])
+        )
+        edited = " (edited)" if message.get("updated_at", message["created_at"]) != message["created_at"] else ""
+        write(
+            "<div class=\"message\">"
+            f"<span class=\"author\">{escape(message['author_name'])}</span>"
+            f"<span class=\"time\">{_format_timestamp(message['created_at'])}{edited}</span>"
+            f"<div class=\"content\">{escape(message['content'])}</div>{attachments}</div>"
+        )
+
+    write(f"<hr><p>{len(messages)} messages</p></body></html>")
+
+    if writer is not buffer:
+        writer.close()
+    return buffer.getvalue()
+
+
+def transcript_filename(ticket_id: str) -> str:
+    return f"transcript-{ticket_id}.{FILE_EXTENSIONS.get(TRANSCRIPT_COMPRESSION, 'html')}"
+
+
+async def build_transcript(ticket: dict, messages: list) -> bytes:
+    """
+    Renders the transcript in a worker process without blocking the event loop.
+
+    The worker runs this module as its own entry point instead of a multiprocessing child,
+    which would import the app's main module again and with it the bot, web and database
+    setup. At most `TRANSCRIPT_WORKERS` transcripts render at once.
+    """
+    async with _render_slots:
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", __name__,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=SOURCE_ROOT
+        )
+        try:
+            transcript, error = await process.communicate(pickle.dumps((ticket, messages, TRANSCRIPT_COMPRESSION)))
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+
+    if process.returncode != 0:
+        raise RuntimeError(f"Transcript worker exited with {process.returncode}: {error.decode(errors='replace')}")
+    return transcript
+
+
+if __name__ == "__main__":
+    ticket, messages, compression = pickle.load(sys.stdin.buffer)
+    sys.stdout.buffer.write(render_transcript(ticket, messages, compression))
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, create_model
 from typing import Optional
+from functools import wraps
 
 
 def validate_fields(model: BaseModel, strict: bool = False):
@@ -10,6 +11,7 @@ def validate_fields(model: BaseModel, strict: bool = False):
         )
 
     def decorator(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             if not kwargs:
                 raise ValueError("No fields provided")
@@ -0,0 +1,34 @@
+from quart import Blueprint, request, jsonify, render_template
+from routes.auth import SignupRequest
+from modules.auth import authenticator
+
+
+# ASGI port of `routes.auth`
+
+auth_bp = Blueprint('auth', __name__)
+
+
+@auth_bp.route('/api/v1/auth/signup', methods=['POST'])
+async def auth():
+    data = SignupRequest.model_validate(await request.get_json())
+
+    token = authenticator.jwt.encrypt(
+        data.model_dump()
+    )
+
+    return jsonify({"token": token})
+
+
+@auth_bp.route('/auth', methods=['GET'])
+async def auth_page():
+    return await render_template('auth.html')
+
+
+@auth_bp.route('/support', methods=['GET'])
+async def support_page():
+    return await render_template('support.html')
+
+
+@auth_bp.route('/tickets/<id>', methods=['GET'])
+async def chat_page(id: str):
+    return await render_template('chat.html', id=id)
@@ -0,0 +1,127 @@
+from quart import Blueprint, Response, request, jsonify
+
+from modules.async_decorator import async_ticket_user_required, async_rate_limit
+from database.async_messages import insert_message, fetch_messages_page, fetch_message_changes, fetch_committed_version
+from database.async_tickets import fetch_ticket
+from database.async_delivery_queue import enqueue_delivery
+from modules.delivery import delivery_pool
+from utils.helper import send_webhook_message_async
+from routes.messages import (
+    messages_response_body,
+    sync_response_body,
+    has_page_cursor,
+    page_cursor,
+    HISTORY_PAGE_LIMIT
+)
+from utils.enums import DeliveryStatus
+
+from utils.exceptions import NotfoundError, ForbiddenError, InternalServerError
+
+from utils.schema import (
+    Message, 
+    TicketUser, 
+    SendMessageRequest, 
+    MessageHistoryQuery,
+    MessageSyncQuery,
+    message_response_data
+)
+
+
+
+# ASGI port of `routes.messages`
+
+bp_messages = Blueprint('messages', __name__, url_prefix='/api/v1/tickets')
+
+
+def is_history_page_request() -> bool:
+    """Quart version of `routes.messages.is_history_page_request`."""
+    return has_page_cursor(request.view_args['ticket_id'], request.args)
+
+
+@bp_messages.route('/<ticket_id>/messages', methods=['POST'])
+@async_ticket_user_required
+@async_rate_limit("10 per minute")
+async def create_message(ticket_user: TicketUser, ticket_id: str):
+    ticket = await fetch_ticket(
+        ticket_id=ticket_id,
+        user_id=ticket_user.id
+    )
+    if not ticket:
+        raise NotfoundError(message="Ticket not found")
+
+    if ticket.status != 'ACTIVE':
+        raise ForbiddenError(message="This action is not allowed on a closed ticket")
+
+    message_payload = SendMessageRequest.model_validate(await request.get_json())
+
+    message = Message(
+        ticket_id=ticket_id,
+        author_id=ticket_user.id,
+        author_name=ticket_user.username,
+        content=message_payload.content,
+        attachments=message_payload.attachments
+    )
+
+    if delivery_pool.enabled:
+        message.delivery_status = DeliveryStatus.PENDING
+        await insert_message(message)
+        await enqueue_delivery(message, user_id=ticket_user.id, webhook_url=ticket.webhook_url)
+        delivery_pool.notify()
+
+        return jsonify(message_response_data(message)), 202
+
+    success = await send_webhook_message_async(
+        url=ticket.webhook_url,
+        content=message.content
+    )
+
+    if success is not True:
+        raise InternalServerError(message="Failed to send message to deliver your message")
+
+    await insert_message(message)
+
+    return jsonify(message_response_data(message)), 201
+
+
+@bp_messages.route('/<ticket_id>/messages', methods=['GET'])
+@async_ticket_user_required
+@async_rate_limit("10 per minute", exempt_when=is_history_page_request)
+@async_rate_limit(HISTORY_PAGE_LIMIT, exempt_when=lambda: not is_history_page_request())
+async def get_messages(ticket_user: TicketUser, ticket_id: str):
+    ticket = await fetch_ticket(
+        ticket_id=ticket_id,
+        user_id=ticket_user.id
+    )
+    if ticket is None or ticket.status != 'ACTIVE':
+        raise NotfoundError(message="Ticket not found")
+
+    query = MessageHistoryQuery.model_validate(request.args.to_dict())
+    documents = await fetch_messages_page(
+        ticket_id,
+        before=page_cursor(ticket_id, query.before),
+        after=page_cursor(ticket_id, query.after),
+        limit=query.limit + 1,
+        descending=query.sort == "desc"
+    )
+
+    return Response(messages_response_body(documents, query.limit, ticket_id), status=200, mimetype='application/json')
+
+
+@bp_messages.route('/<ticket_id>/messages/sync', methods=['GET'])
+@async_ticket_user_required
+@async_rate_limit("10 per minute")
+async def sync_messages(ticket_user: TicketUser, ticket_id: str):
+    ticket = await fetch_ticket(
+        ticket_id=ticket_id,
+        user_id=ticket_user.id
+    )
+    if ticket is None or ticket.status != 'ACTIVE':
+        raise NotfoundError(message="Ticket not found")
+
+    query = MessageSyncQuery.model_validate(request.args.to_dict())
+    since = int(query.since)
+    until = max(since, await fetch_committed_version(ticket_id))
+    cursor = await fetch_message_changes(ticket_id, since=since, until=until, limit=query.limit + 1)
+    documents = await cursor.to_list(None)
+
+    return Response(sync_response_body(documents, query.limit, until), status=200, mimetype='application/json')
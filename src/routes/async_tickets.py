@@ -0,0 +1,115 @@
+from quart import Blueprint, request, jsonify
+
+from typing_extensions import List
+
+from modules.async_decorator import async_ticket_user_required, async_rate_limit
+
+from utils.enums import TicketStatus
+from utils.schema import (
+    CreateTicketRequest, 
+    Ticket, 
+    TicketUser,
+    TicketListQuery,
+    ticket_response_data
+)
+
+from utils.exceptions import InternalServerError, NotfoundError, ServiceUnavailableError
+
+from discord.errors import DiscordException
+
+from discord_bot.app import (
+    ticket_manager, 
+    run_provisioning,
+    is_running
+)
+
+from database.tickets import ticket_page_cursor
+from routes.tickets import PROVISION_RETRY_AFTER
+from database.async_tickets import (
+    insert_ticket, 
+    fetch_ticket, 
+    fetch_user_tickets_page,
+    count_user_tickets
+)
+
+import asyncio
+
+
+# ASGI port of `routes.tickets`, the handlers run on the bot loop so tickets are provisioned
+# by awaiting the ticket manager directly instead of hopping threads.
+
+bp_tickets = Blueprint('tickets', __name__, url_prefix='/api/v1/tickets')
+
+
+@bp_tickets.route('', methods=['POST'])
+@async_ticket_user_required
+@async_rate_limit("3 per minute")
+async def create_ticket(ticket_user: TicketUser):
+    # Web only workers have no bot, ticket creation has to be routed to the bot process
+    if not is_running.is_set():
+        raise ServiceUnavailableError(message="Tickets can not be created on this server")
+
+    ticket_payload = CreateTicketRequest.model_validate(await request.get_json())
+
+    try:
+        channel_id, webhook_url = await run_provisioning(
+        ticket_manager.create_ticket(
+        ticket_payload.topic,
+        description=ticket_payload.description,
+        user=ticket_user
+    ))
+    except DiscordException as e:
+        raise InternalServerError(message="An error occurred while creating the ticket", error=e)
+    except asyncio.TimeoutError:
+        raise ServiceUnavailableError(message="Timed out while creating the ticket, please try again", retry_after=PROVISION_RETRY_AFTER)
+
+    ticket_data = Ticket(
+        id=str(channel_id),
+        user_id=ticket_user.id,
+        user_email=ticket_user.email,
+        username=ticket_user.username,
+        channel_id=channel_id,
+        user_role=ticket_user.role,
+        topic=ticket_payload.topic,
+        description=ticket_payload.description,
+        webhook_url=webhook_url
+    )
+
+    await insert_ticket(ticket_data)
+
+    return jsonify(ticket_response_data(ticket_data)), 201
+
+
+@bp_tickets.route('/<int:ticket_id>', methods=['GET'])
+@async_ticket_user_required
+async def get_ticket(ticket_user: TicketUser, ticket_id: int):
+    ticket_data = await fetch_ticket(
+        ticket_id=ticket_id,
+        user_id=ticket_user.id
+    )
+    if not ticket_data or ticket_data.status != TicketStatus.ACTIVE:
+        raise NotfoundError(message="Ticket not found")
+
+    return jsonify(ticket_response_data(ticket_data)), 200
+
+
+@bp_tickets.route('', methods=['GET'])
+@async_ticket_user_required
+async def get_tickets(ticket_user: TicketUser):
+    query = TicketListQuery.model_validate(request.args.to_dict())
+    filters = {
+        "status": query.status,
+        "issue_level": query.issue_level,
+        "support_role": query.support_role
+    }
+    if query.count:
+        return jsonify({"count": await count_user_tickets(ticket_user.id, **filters)}), 200
+
+    # Documents are projected to `TicketResponse` by the query and sent as they are
+    tickets = await fetch_user_tickets_page(ticket_user.id, **filters, after=query.cursor, limit=query.limit + 1)
+    next_cursor = None
+    if len(tickets) > query.limit:
+        tickets = tickets[:query.limit]
+        next_cursor = ticket_page_cursor(tickets[-1])
+
+    return jsonify({"tickets": tickets, "next_cursor": next_cursor}), 200
@@ -1,11 +1,7 @@
 from flask import Blueprint, request, jsonify, render_template
 from pydantic import BaseModel
 from utils.enums import UserRole
-from modules.auth import JWT
-
-import os
-
-jwt = JWT(os.getenv('JWT_SECRET_KEY'))
+from modules.auth import authenticator
 
 
 class SignupRequest(BaseModel):
@@ -22,7 +18,7 @@ auth_bp = Blueprint('auth', __name__)
 def auth():
     data = SignupRequest.model_validate(request.json)
     
-    token = jwt.encrypt(
+    token = authenticator.jwt.encrypt(
         data.model_dump()
     )
 
@@ -42,5 +38,4 @@ def support_page():
 
 @auth_bp.route('/tickets/<id>', methods=['GET'])
 def chat_page(id: str):
-    print(id)
     return render_template('chat.html', id=id)
\ No newline at end of file
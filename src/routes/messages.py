@@ -1,22 +1,116 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from modules.decorator import ticket_user_required
-from database.messages import insert_message, fetch_messages
+from database.messages import (
+    insert_message,
+    fetch_messages_page,
+    fetch_message_changes,
+    fetch_committed_version,
+    message_page_cursor
+)
 from database.tickets import fetch_ticket
+from database.delivery_queue import enqueue_delivery
+from modules.delivery import delivery_pool
 from utils.helper import send_webhook_message
+from utils.enums import DeliveryStatus
 
 
-from utils.exceptions import NotfoundError, ForbiddenError, InternalServerError
+from utils.exceptions import NotfoundError, ForbiddenError, InternalServerError, BadRequestError
 
 from utils.schema import (
     Message, 
     TicketUser, 
     SendMessageRequest, 
-    MessageResponse
+    MessageHistoryQuery,
+    MessageSyncQuery,
+    message_response_data
 )
 
+import hashlib
+import orjson
+import hmac
+import os
+
 bp_messages = Blueprint('messages', __name__, url_prefix='/api/v1/tickets')
 
 
+# Limit of history requests that continue from a cursor, loading a long ticket takes many
+HISTORY_PAGE_LIMIT = "300 per minute"
+
+# History cursors are signed per ticket, so only a cursor handed out by a previous page
+# gets the relaxed limit and can not be made up or moved to another ticket
+CURSOR_KEY = hashlib.sha256(b"message-page-cursor:" + os.getenv("JWT_SECRET_KEY", "").encode()).digest()
+
+
+def sign_page_cursor(ticket_id: str, cursor: str) -> str:
+    signature = hmac.new(CURSOR_KEY, f"{ticket_id}:{cursor}".encode(), hashlib.sha256).hexdigest()[:16]
+    return f"{cursor}:{signature}"
+
+def read_page_cursor(ticket_id: str, value: str) -> str | None:
+    """The `<created_at>:<id>` cursor of a signed `next_cursor`, None when the signature is wrong."""
+    cursor = value.rsplit(':', 1)[0]
+    return cursor if hmac.compare_digest(sign_page_cursor(ticket_id, cursor), value) else None
+
+def page_cursor(ticket_id: str, value: str) -> str:
+    if value is None:
+        return None
+
+    cursor = read_page_cursor(ticket_id, value)
+    if cursor is None:
+        raise BadRequestError(message="Invalid cursor, use the `next_cursor` of a previous page")
+    return cursor
+
+
+def has_page_cursor(ticket_id: str, args) -> bool:
+    """Whether a history request continues from cursors handed out by a previous page."""
+    cursors = [args[name] for name in ('before', 'after') if args.get(name)]
+    return bool(cursors) and all(read_page_cursor(ticket_id, cursor) for cursor in cursors)
+
+def is_history_page_request() -> bool:
+    """Whether the request continues a message history listing from a signed cursor."""
+    return (
+        request.endpoint == 'messages.get_messages'
+        and has_page_cursor(request.view_args['ticket_id'], request.args)
+    )
+
+
+def messages_response_body(documents: list, limit: int, ticket_id: str) -> bytes:
+    """
+    A `MessagesResponse` JSON body from up to `limit + 1` documents, the extra one only
+    tells us that another page exists and is never sent to the client.
+    """
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_cursor = sign_page_cursor(ticket_id, message_page_cursor(documents[-1])) if has_more else None
+
+    return orjson.dumps({"messages": documents, "next_cursor": next_cursor})
+
+
+def sync_response_body(documents: list, limit: int, until: int) -> bytes:
+    """
+    A `MessageSyncResponse` JSON body from up to `limit + 1` documents in version order.
+
+    Tombstones only add their id to `deleted`. Without another page the token moves up to
+    `until`, the committed version the documents were read at.
+    """
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    next_token = documents[-1]['version'] if has_more else until
+
+    messages = []
+    deleted = []
+    for document in documents:
+        if document.pop('deleted', False):
+            deleted.append(document['id'])
+        else:
+            messages.append(document)
+
+    return orjson.dumps({
+        "messages": messages,
+        "deleted": deleted,
+        "next_token": str(next_token),
+        "has_more": has_more
+    })
+
 
 @bp_messages.route('/<ticket_id>/messages', methods=['POST'])
 @ticket_user_required
@@ -41,6 +135,15 @@ def create_message(ticket_user: TicketUser, ticket_id: str):
         attachments=message_payload.attachments
     )
 
+    if delivery_pool.enabled:
+        # Accept now, a delivery worker posts it to Discord and reports back over the socket
+        message.delivery_status = DeliveryStatus.PENDING
+        insert_message(message)
+        enqueue_delivery(message, user_id=ticket_user.id, webhook_url=ticket.webhook_url)
+        delivery_pool.notify()
+
+        return jsonify(message_response_data(message)), 202
+
     success = send_webhook_message(
         url=ticket.webhook_url,
         content=message.content,
@@ -52,7 +155,7 @@ def create_message(ticket_user: TicketUser, ticket_id: str):
 
     insert_message(message)
 
-    return jsonify(MessageResponse(**message.model_dump()).model_dump()), 201
+    return jsonify(message_response_data(message)), 201
 
 
 @bp_messages.route('/<ticket_id>/messages', methods=['GET'])
@@ -66,5 +169,32 @@ def get_messages(ticket_user: TicketUser, ticket_id: str):
     if ticket is None or ticket.status != 'ACTIVE':
         raise NotfoundError(message="Ticket not found")
     
-    messages = fetch_messages(ticket_id)
-    return jsonify([MessageResponse(**message.model_dump()).model_dump() for message in messages]), 200
+    query = MessageHistoryQuery.model_validate(request.args.to_dict())
+    documents = fetch_messages_page(
+        ticket_id,
+        before=page_cursor(ticket_id, query.before),
+        after=page_cursor(ticket_id, query.after),
+        limit=query.limit + 1,
+        descending=query.sort == "desc"
+    )
+
+    return Response(messages_response_body(documents, query.limit, ticket_id), status=200, mimetype='application/json')
+
+
+@bp_messages.route('/<ticket_id>/messages/sync', methods=['GET'])
+@ticket_user_required
+def sync_messages(ticket_user: TicketUser, ticket_id: str):
+    ticket = fetch_ticket(
+        ticket_id=ticket_id,
+        user_id=ticket_user.id
+    )
+    if ticket is None or ticket.status != 'ACTIVE':
+        raise NotfoundError(message="Ticket not found")
+
+    query = MessageSyncQuery.model_validate(request.args.to_dict())
+    since = int(query.since)
+    # Never past a version that is reserved but not written yet, it would be skipped for good
+    until = max(since, fetch_committed_version(ticket_id))
+    documents = list(fetch_message_changes(ticket_id, since=since, until=until, limit=query.limit + 1))
+
+    return Response(sync_response_body(documents, query.limit, until), status=200, mimetype='application/json')
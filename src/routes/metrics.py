@@ -0,0 +1,12 @@
+from flask import Blueprint, Response, request
+
+from utils.metrics import render_metrics
+
+
+bp_metrics = Blueprint('metrics', __name__)
+
+
+@bp_metrics.route('/metrics', methods=['GET'])
+def metrics():
+    body, content_type = render_metrics(request.headers.get('Authorization'))
+    return Response(body, status=200, content_type=content_type)
@@ -5,7 +5,6 @@ from typing_extensions import List
 
 
 from modules.decorator import ticket_user_required
-from modules.auth import JWT
 
 from utils.enums import TicketStatus
 from utils.helper import rate_limit_handler
@@ -13,26 +12,31 @@ from utils.schema import (
     CreateTicketRequest, 
     Ticket, 
     TicketUser,
-    TicketResponse
+    TicketListQuery,
+    ticket_response_data
 )
 
-from utils.exceptions import AuthenticationError, InternalServerError, NotfoundError
+from utils.exceptions import AuthenticationError, InternalServerError, NotfoundError, ServiceUnavailableError
 
 from discord.errors import DiscordException
 
 from discord_bot.app import (
     ticket_manager, 
-    bot_run_async_coroutine
+    bot_run_async_coroutine,
+    is_running
 )
 
 from database.tickets import (
     insert_ticket, 
     fetch_ticket, 
-    fetch_user_tickets
+    fetch_user_tickets_page,
+    count_user_tickets,
+    ticket_page_cursor
 )
 
 import os
 import threading
+import concurrent.futures
 
 
 
@@ -43,7 +47,9 @@ ticket_limiter = Limiter(
     storage_uri="memory://"
 ) 
 create_ticket_lock = threading.Lock()
-jwt_enc = JWT(encryption_key=os.getenv('JWT_SECRET_KEY'))
+
+# Seconds a client is asked to wait before retrying a ticket that timed out while provisioning
+PROVISION_RETRY_AFTER = 5
 
 bp_tickets = Blueprint('tickets', __name__, url_prefix='/api/v1/tickets')
 
@@ -54,6 +60,10 @@ bp_tickets = Blueprint('tickets', __name__, url_prefix='/api/v1/tickets')
 @ticket_limiter.limit("3 per minute")
 @ticket_user_required
 def create_ticket(ticket_user: TicketUser):
+    # Web only workers have no bot, ticket creation has to be routed to the bot process
+    if not is_running.is_set():
+        raise ServiceUnavailableError(message="Tickets can not be created on this server")
+
     # Validate the request payload
     ticket_payload = CreateTicketRequest.model_validate(request.get_json())
 
@@ -66,6 +76,9 @@ def create_ticket(ticket_user: TicketUser):
     ))
     except DiscordException as e:
         raise InternalServerError(message="An error occurred while creating the ticket", error=e)
+    except concurrent.futures.TimeoutError:
+        # The bot is busy provisioning other tickets, not broken
+        raise ServiceUnavailableError(message="Timed out while creating the ticket, please try again", retry_after=PROVISION_RETRY_AFTER)
     
         
     ticket_data = Ticket(
@@ -82,7 +95,7 @@ def create_ticket(ticket_user: TicketUser):
 
 
     insert_ticket(ticket_data)
-    data = TicketResponse(**ticket_data.model_dump()).model_dump()
+    data = ticket_response_data(ticket_data)
 
     return jsonify(data), 201
 
@@ -99,15 +112,27 @@ def get_ticket(ticket_user: TicketUser, ticket_id: int):
         raise NotfoundError(message="Ticket not found")
 
 
-    return jsonify(TicketResponse(**ticket_data.model_dump()).model_dump()), 200
+    return jsonify(ticket_response_data(ticket_data)), 200
 
 
 
 @bp_tickets.route('', methods=['GET'])
 @ticket_user_required
 def get_tickets(ticket_user: TicketUser):
-    tickets: List[Ticket] = fetch_user_tickets(ticket_user.id, status=[TicketStatus.ACTIVE])
-
-    ticket_list = [TicketResponse(**ticket.model_dump()).model_dump() for ticket in tickets]
-    
-    return jsonify(ticket_list), 200
\ No newline at end of file
+    query = TicketListQuery.model_validate(request.args.to_dict())
+    filters = {
+        "status": query.status,
+        "issue_level": query.issue_level,
+        "support_role": query.support_role
+    }
+    if query.count:
+        return jsonify({"count": count_user_tickets(ticket_user.id, **filters)}), 200
+
+    # Documents are projected to `TicketResponse` by the query and sent as they are
+    tickets = fetch_user_tickets_page(ticket_user.id, **filters, after=query.cursor, limit=query.limit + 1)
+    next_cursor = None
+    if len(tickets) > query.limit:
+        tickets = tickets[:query.limit]
+        next_cursor = ticket_page_cursor(tickets[-1])
+
+    return jsonify({"tickets": tickets, "next_cursor": next_cursor}), 200
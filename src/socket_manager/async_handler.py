@@ -0,0 +1,69 @@
+from pydantic import ValidationError
+from modules.auth import authenticator
+from utils.exceptions import AuthenticationError
+from socket_manager.session_store import session_store
+from socket_manager.emitter import FRAME_ENCODERS
+from socket_manager.replay_buffer import replay_emits
+from utils.metrics import socket_connections
+
+import socketio
+import asyncio
+import logging
+
+
+logger = logging.getLogger("socket")
+
+
+class AsyncSocketHandler(socketio.AsyncNamespace):
+    """
+    `socket_manager.handler.SocketHandler` for the ASGI server, with the same events and rooms.
+    The session store and replay buffer can be backed by Redis and are called from worker threads.
+    """
+    authenticated_users = session_store
+
+    async def on_authorize(self, sid: str, data: dict) -> bool:
+        try:
+            token = data['token']
+            user = authenticator.authenticate(token)
+
+        except KeyError:
+            await self.emit("error", {"message": "Authorization token missing"}, to=sid)
+            return False
+
+        except ValidationError as e:
+            logger.info("Invalid or expired token", extra={"sid": sid})
+            await self.emit("error", {"message": f"Invalid token structure: {str(e)}"}, to=sid)
+            return False
+
+        except AuthenticationError:
+            logger.info("Invalid or expired token", extra={"sid": sid})
+            await self.emit("error", {"message": "Invalid or expired token"}, to=sid)
+            return False
+
+        encoding = data.get("encoding")
+        room = f"{user.id}:{encoding}" if encoding in FRAME_ENCODERS else user.id
+        await self.enter_room(sid, room)
+        await asyncio.to_thread(self.authenticated_users.set, sid, user, room=room)
+        await self.emit("authorized", {"message": "User successfully authorized"}, to=sid)
+        logger.info("User authorized", extra={"sid": sid, "user_id": user.id})
+
+        last_seq = data.get("last_seq")
+        if isinstance(last_seq, int):
+            for event, payload in await asyncio.to_thread(replay_emits, user.id, last_seq, encoding):
+                await self.emit(event, payload, to=sid)
+        return True
+
+    async def on_connect(self, sid: str, environ: dict):
+        socket_connections.inc()
+        logger.debug("User connected", extra={"sid": sid})
+
+    async def on_disconnect(self, sid: str):
+        logger.debug("User disconnected", extra={"sid": sid})
+        socket_connections.dec()
+
+        user = await asyncio.to_thread(self.authenticated_users.pop, sid)
+        if user:
+            await self.leave_room(sid, user.id)
+            logger.debug("User removed from their room", extra={"sid": sid, "user_id": user.id})
+        else:
+            logger.debug("Disconnected user was not authenticated", extra={"sid": sid})
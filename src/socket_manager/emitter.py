@@ -0,0 +1,240 @@
+from flask_socketio import SocketIO
+from pydantic import BaseModel
+from utils.metrics import socket_emit_queue_depth
+
+import msgpack
+import orjson
+import asyncio
+import threading
+import logging
+import queue
+import time
+import os
+
+
+logger = logging.getLogger("socket")
+
+
+# Encodings a client can negotiate on `authorize`, it then receives one `events` frame per batch
+# in its `<user_id>:<encoding>` room instead of one socket event per message.
+FRAME_ENCODERS = {
+    "json": lambda frame: orjson.dumps(frame).decode(),
+    "msgpack": lambda frame: msgpack.packb(frame),
+}
+
+COALESCED_EVENTS = ("message", "edit_message", "delete_message")
+
+
+class SocketEmitter:
+    """
+    Emits socket events from a dedicated background task fed by a bounded queue.
+
+    Events queued within `window` seconds are coalesced per message id (the last edit wins,
+    a message created and deleted in the same window is never sent) and grouped per room.
+    Events queued with `replay` are then numbered in the replay buffer, so the sequence
+    numbers clients see have no gaps. With a session store only the rooms that have
+    sessions are emitted to, frames are encoded for the encodings in use. Callers never
+    block: when the queue is full the event is dropped and counted.
+    """
+    def __init__(self, maxsize: int = 10000, window: float = 0.025, max_batch: int = 500) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._sio: SocketIO = None
+        self._replay_buffer = None
+        self._session_store = None
+
+        # Set by `start_async` when emitting through a `socketio.AsyncServer`
+        self._async_queue: asyncio.Queue = None
+        self._loop: asyncio.AbstractEventLoop = None
+        self._loop_thread: int = None
+
+        self.dropped = 0
+        self.frames = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+
+    def start(self, sio: SocketIO, replay_buffer=None, session_store=None) -> None:
+        if self._sio is not None:
+            return
+
+        self._sio = sio
+        self._replay_buffer = replay_buffer
+        self._session_store = session_store
+        sio.start_background_task(self._run)
+
+    def start_async(self, server, replay_buffer=None, session_store=None) -> None:
+        """
+        Emits through an asyncio `socketio.AsyncServer` from a task on the running loop.
+        Events are numbered and rooms looked up in a worker thread, the Redis stores block.
+        """
+        if self._sio is not None:
+            return
+
+        self._sio = server
+        self._replay_buffer = replay_buffer
+        self._session_store = session_store
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._async_queue = asyncio.Queue(maxsize=self._queue.maxsize)
+        self._loop.create_task(self._run_async())
+
+    def emit(self, event: str, data, room: str, key: str = None, replay: bool = False) -> None:
+        """
+        Queues an event, `data` can be a pydantic model and is only dumped on the emitter task.
+        `key` identifies the message an event belongs to so bursts can be coalesced, `replay`
+        numbers the event in the replay buffer of `room`.
+        """
+        item = (time.monotonic(), event, data, str(room), key, replay)
+        if self._async_queue is not None and threading.get_ident() != self._loop_thread:
+            self._loop.call_soon_threadsafe(self._put, self._async_queue, item)
+        else:
+            self._put(self._async_queue or self._queue, item)
+
+    def stats(self) -> dict:
+        return {
+            "queue_size": (self._async_queue or self._queue).qsize(),
+            "dropped": self.dropped,
+            "frames": self.frames,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+
+    def _put(self, target, item: tuple) -> None:
+        try:
+            target.put_nowait(item)
+        except (queue.Full, asyncio.QueueFull):
+            self.dropped += 1
+
+    def _record_lag(self, batch: list) -> None:
+        self.last_lag = time.monotonic() - batch[0][0]
+        self.max_lag = max(self.max_lag, self.last_lag)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._record_lag(batch)
+            try:
+                rooms = self._coalesce(batch)
+                active = self._prepare(rooms)
+                for event, data, room in self._frames(rooms, active):
+                    self._sio.emit(event, data, room=room)
+            except Exception:
+                logger.exception("Failed to emit socket events")
+
+    async def _run_async(self) -> None:
+        while True:
+            batch = [await self._async_queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._async_queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            self._record_lag(batch)
+            try:
+                rooms = self._coalesce(batch)
+                active = None
+                if self._replay_buffer is not None or self._session_store is not None:
+                    active = await asyncio.to_thread(self._prepare, rooms)
+                for event, data, room in self._frames(rooms, active):
+                    await self._sio.emit(event, data, room=room)
+            except Exception:
+                logger.exception("Failed to emit socket events")
+
+    def _coalesce(self, batch: list) -> dict:
+        """Coalesces a batch into the `(event, data, replay)` events of each room, in order."""
+        rooms: dict[str, dict] = {}
+        for index, (_, event, data, room, key, replay) in enumerate(batch):
+            events = rooms.setdefault(room, {})
+            if key is None or event not in COALESCED_EVENTS:
+                events[(event, index)] = (event, data, replay)
+                continue
+
+            created = ("message", key) in events
+            if event == "edit_message" and created:
+                # The client has not seen the message yet, send it with the final content
+                events[("message", key)] = ("message", data, replay)
+            elif event == "edit_message":
+                events.pop(("edit_message", key), None)
+                events[("edit_message", key)] = (event, data, replay)
+            elif event == "delete_message":
+                events.pop(("edit_message", key), None)
+                if created:
+                    events.pop(("message", key))
+                else:
+                    events[("delete_message", key)] = (event, data, replay)
+            else:
+                events[(event, key)] = (event, data, replay)
+
+        return {
+            room: [
+                (event, data.model_dump(mode="json") if isinstance(data, BaseModel) else data, replay)
+                for event, data, replay in events.values()
+            ]
+            for room, events in rooms.items()
+        }
+
+    def _prepare(self, rooms: dict) -> set:
+        """
+        Numbers the replayed events of every room and returns the socket rooms that have
+        sessions, None when every room is emitted to. Events stay unnumbered when numbering fails.
+        """
+        if self._replay_buffer is not None:
+            for room, events in rooms.items():
+                numbered = [(event, data) for event, data, replay in events if replay]
+                if not numbered:
+                    continue
+                try:
+                    self._replay_buffer.extend(room, numbered)
+                except Exception:
+                    logger.exception("Failed to number socket events", extra={"user_id": room})
+
+        if self._session_store is None:
+            return None
+        targets = [target for room in rooms for target in (room, *(f"{room}:{encoding}" for encoding in FRAME_ENCODERS))]
+        try:
+            return self._session_store.active_rooms(targets)
+        except Exception:
+            logger.exception("Failed to look up socket rooms")
+            return None
+
+    def _frames(self, rooms: dict, active: set = None):
+        """Yields the `(event, data, room)` emits of coalesced rooms, only to `active` ones when given."""
+        for room, events in rooms.items():
+            frame = [{"event": event, "data": data} for event, data, _ in events]
+            if not frame:
+                continue
+
+            # Clients that did not negotiate an encoding keep receiving plain events
+            if active is None or room in active:
+                for item in frame:
+                    yield item["event"], item["data"], room
+
+            for encoding, encode in FRAME_ENCODERS.items():
+                if active is None or f"{room}:{encoding}" in active:
+                    yield "events", encode(frame), f"{room}:{encoding}"
+            self.frames += 1
+
+
+socket_emitter = SocketEmitter(
+    maxsize=int(os.getenv("SOCKET_EMIT_QUEUE_SIZE", 10000)),
+    window=float(os.getenv("SOCKET_EMIT_WINDOW", 0.025))
+)
+socket_emit_queue_depth.set_function(lambda: (socket_emitter._async_queue or socket_emitter._queue).qsize())
@@ -1,9 +1,12 @@
 from flask import request
 from pydantic import ValidationError
-from typing_extensions import Dict
 from utils.schema import TicketUser
-from modules.auth import JWT
+from modules.auth import authenticator
 from utils.exceptions import AuthenticationError
+from socket_manager.session_store import session_store
+from socket_manager.emitter import FRAME_ENCODERS
+from socket_manager.replay_buffer import replay_emits
+from utils.metrics import socket_connections
 
 from flask_socketio import (
     Namespace, 
@@ -12,62 +15,75 @@ from flask_socketio import (
     leave_room
 )
 
+import logging
 import os
 
 
+logger = logging.getLogger("socket")
+
 
-jwt = JWT(os.getenv("JWT_SECRET_KEY"))
 
 class SocketHandler(Namespace):
-    authenticated_users: Dict[int, TicketUser]  = {}  # Dictionary to track authenticated users by `request.sid`
+    authenticated_users = session_store  # Tracks authenticated users by `request.sid`, shared between workers when a message queue is set
 
     def on_authorize(self, data: dict) -> bool:
         """
         Authorizes a user and adds them to their respective room based on their user ID.
+        With `last_seq` the events numbered after it are replayed once the room is joined.
         """
         try:
             token = data['token']
-            user_data = jwt.decrypt(token)
-            user = TicketUser(**user_data)
+            user = authenticator.authenticate(token)
 
         except KeyError:
             emit("error", {"message": "Authorization token missing"})
             return False
 
         except ValidationError as e:
-            print("Invalid or expired token")
+            logger.info("Invalid or expired token", extra={"sid": request.sid})
             emit("error", {"message": f"Invalid token structure: {str(e)}"})
             return False
 
         except AuthenticationError:
-            print("Invalid or expired token")
+            logger.info("Invalid or expired token", extra={"sid": request.sid})
             emit("error", {"message": "Invalid or expired token"})
             return False
         
         
-            # Track the user as authenticated
-        self.authenticated_users[request.sid] = user
         # Join the user to their specific room (room name based on user ID)
+        # Clients that negotiate an encoding get batched `events` frames in their own room
+        encoding = data.get("encoding")
+        room = f"{user.id}:{encoding}" if encoding in FRAME_ENCODERS else user.id
+        join_room(room)
 
-        join_room(user.id)
+        # Track the user as authenticated, the store counts the room so the emitter sends to it
+        self.authenticated_users.set(request.sid, user, room=room)
         emit("authorized", {"message": "User successfully authorized"})
-        print(f"User {user.id} authorized and added to their room")
+        logger.info("User authorized", extra={"sid": request.sid, "user_id": user.id})
+
+        # Joined first so nothing is missed, an event can arrive twice and is skipped by its seq
+        last_seq = data.get("last_seq")
+        if isinstance(last_seq, int):
+            for event, payload in replay_emits(user.id, last_seq, encoding):
+                emit(event, payload)
         return True
 
     def on_connect(self):
-        print("User connected:", request.sid)
+        socket_connections.inc()
+        logger.debug("User connected", extra={"sid": request.sid})
 
     def on_disconnect(self):
         """
         Handles user disconnection by removing them from their room and cleaning up state.
         """
-        print("User disconnected:", request.sid)
+        logger.debug("User disconnected", extra={"sid": request.sid})
+        socket_connections.dec()
 
         # Check if the user was authenticated
-        user = self.authenticated_users.pop(request.sid, None)
+        user = self.authenticated_users.pop(request.sid)
         if user:
             # Leave the user's room (room name based on user ID)
             leave_room(user.id)
-            print(f"User {user.id} removed from their room")
+            logger.debug("User removed from their room", extra={"sid": request.sid, "user_id": user.id})
         else:
-            print("Disconnected user was not authenticated")
+            logger.debug("Disconnected user was not authenticated", extra={"sid": request.sid})
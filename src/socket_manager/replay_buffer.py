@@ -0,0 +1,140 @@
+from collections import OrderedDict, deque
+
+from socket_manager.emitter import FRAME_ENCODERS
+
+import threading
+import orjson
+import os
+
+
+class MemoryReplayBuffer:
+    """
+    The last `size` socket events of each user with their sequence numbers, kept for the
+    `max_users` most recently active users of this process.
+    """
+    def __init__(self, size: int = 100, max_users: int = 10000) -> None:
+        self.size = size
+        self.max_users = max_users
+        self._users: OrderedDict[str, list] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def extend(self, user_id: str, events: list) -> int:
+        """
+        Numbers the `(event, data)` pairs in order, stores each number as `data["seq"]` and
+        returns the last one.
+        """
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                entry = self._users[user_id] = [0, deque(maxlen=self.size)]
+                if len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+            else:
+                self._users.move_to_end(user_id)
+
+            for event, data in events:
+                entry[0] += 1
+                data["seq"] = entry[0]
+                entry[1].append((event, data))
+            return entry[0]
+
+    def events_after(self, user_id: str, last_seq: int) -> tuple:
+        """
+        Returns `(events, seq)` with the `(event, data)` pairs numbered after `last_seq` and the
+        current sequence number. `events` is None when some of them are no longer buffered.
+        """
+        with self._lock:
+            seq, events = self._users.get(user_id, (0, ()))
+            if last_seq > seq:
+                # Numbered by a buffer that is gone, e.g. before a restart
+                return None, seq
+
+            missed = [(event, data) for event, data in events if data["seq"] > last_seq]
+            if len(missed) < seq - last_seq:
+                return None, seq
+            return missed, seq
+
+
+class RedisReplayBuffer:
+    """
+    Replay buffer shared by every process through Redis: a counter and a sorted set of
+    events scored by sequence number per user, both expiring `ttl` seconds after the last event.
+    """
+    # Numbers the events and trims the set in one round trip, members are `<seq>:<json>`
+    EXTEND_SCRIPT = """
+    local last = redis.call('INCRBY', KEYS[1], #ARGV - 2)
+    local first = last - (#ARGV - 2) + 1
+    for i = 3, #ARGV do
+        local seq = first + i - 3
+        redis.call('ZADD', KEYS[2], seq, seq .. ':' .. ARGV[i])
+    end
+    redis.call('ZREMRANGEBYRANK', KEYS[2], 0, -tonumber(ARGV[1]) - 1)
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[2])
+    return last
+    """
+
+    def __init__(self, redis_url: str, size: int = 100, ttl: int = 86400, prefix: str = "socket_events") -> None:
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.size = size
+        self.ttl = ttl
+        self.prefix = prefix
+        self._extend = self.redis.register_script(self.EXTEND_SCRIPT)
+
+    def extend(self, user_id: str, events: list) -> int:
+        payloads = [orjson.dumps({"event": event, "data": data}).decode() for event, data in events]
+        last = int(self._extend(
+            keys=[f"{self.prefix}:{user_id}:seq", f"{self.prefix}:{user_id}"],
+            args=[self.size, self.ttl, *payloads]
+        ))
+        for seq, (_, data) in enumerate(events, start=last - len(events) + 1):
+            data["seq"] = seq
+        return last
+
+    def events_after(self, user_id: str, last_seq: int) -> tuple:
+        pipeline = self.redis.pipeline()
+        pipeline.get(f"{self.prefix}:{user_id}:seq")
+        pipeline.zrangebyscore(f"{self.prefix}:{user_id}", f"({last_seq}", "+inf")
+        seq, members = pipeline.execute()
+
+        seq = int(seq or 0)
+        if last_seq > seq or len(members) < seq - last_seq:
+            return None, seq
+
+        events = []
+        for member in members:
+            number, payload = member.split(b":", 1)
+            item = orjson.loads(payload)
+            item["data"]["seq"] = int(number)
+            events.append((item["event"], item["data"]))
+        return events, seq
+
+
+def create_replay_buffer():
+    size = int(os.getenv("SOCKET_REPLAY_SIZE", 100))
+    message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    if message_queue and message_queue.startswith(("redis://", "rediss://")):
+        return RedisReplayBuffer(message_queue, size=size, ttl=int(os.getenv("SOCKET_REPLAY_TTL", 86400)))
+
+    return MemoryReplayBuffer(size=size, max_users=int(os.getenv("SOCKET_REPLAY_USERS", 10000)))
+
+
+replay_buffer = create_replay_buffer()
+
+
+def replay_emits(user_id: str, last_seq: int, encoding: str = None) -> list:
+    """
+    The `(event, data)` emits that bring a client from `last_seq` up to date: the missed
+    events, or `resync_required` when they are no longer buffered. Clients that negotiated
+    an encoding get them as one `events` frame.
+    """
+    events, seq = replay_buffer.events_after(str(user_id), last_seq)
+    if events is None:
+        events = [("resync_required", {"seq": seq})]
+    if not events or encoding not in FRAME_ENCODERS:
+        return events
+
+    frame = [{"event": event, "data": data} for event, data in events]
+    return [("events", FRAME_ENCODERS[encoding](frame))]
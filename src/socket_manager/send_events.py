@@ -1,22 +1,41 @@
 from utils.schema import TicketResponse, Message
 from flask_socketio import SocketIO
 
+from socket_manager.emitter import socket_emitter
+from socket_manager.replay_buffer import replay_buffer
+from socket_manager.session_store import emitter_session_store
+
 sio: SocketIO = None
 
 def socket_sio_init(socket_client: SocketIO):
     global sio
     sio = socket_client
+    socket_emitter.start(socket_client, replay_buffer, emitter_session_store())
+
 
+def emit_user_event(user_id: int, event: str, data, key: str = None):
+    """
+    Queues the event on the emitter, which numbers it in the user's replay buffer after
+    coalescing so a reconnecting client can catch up with `last_seq`.
+    """
+    socket_emitter.emit(event, data, room=user_id, key=key, replay=True)
 
+
+# Events are queued on the emitter and sent from its background task, these never block on Discord or the socket
 def ticket_close_event(user_id: int, ticket: TicketResponse):
-    sio.emit("ticket_closed", ticket.model_dump(exclude={"webhook_url"}), room=user_id)
+    emit_user_event(user_id, "ticket_closed", ticket)
     
 def send_message_event(user_id: int, message: Message):
-    sio.emit("message", message.model_dump(), room=user_id)
+    emit_user_event(user_id, "message", message, key=message.id)
 
 def message_edit_event(user_id: int, message: Message):
-    sio.emit("edit_message", message.model_dump(), room=user_id)
+    emit_user_event(user_id, "edit_message", message, key=message.id)
 
 def message_delete_event(user_id: int, message: Message):
-    sio.emit("delete_message", message.model_dump(), room=user_id)
+    emit_user_event(user_id, "delete_message", message, key=message.id)
+
+def message_delivered_event(user_id: int, message: Message):
+    emit_user_event(user_id, "message_delivered", message)
 
+def message_failed_event(user_id: int, message: Message):
+    emit_user_event(user_id, "message_failed", message)
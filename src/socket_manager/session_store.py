@@ -0,0 +1,125 @@
+from utils.schema import TicketUser
+from utils.metrics import socket_sessions
+
+from collections import Counter
+
+import threading
+import os
+
+
+class MemorySessionStore:
+    """
+    Socket sessions of this process only, used without a Redis message queue.
+    Also counts the sessions in each socket room, so the emitter can skip empty ones.
+    """
+    def __init__(self) -> None:
+        self._sessions: dict[str, TicketUser] = {}
+        self._session_rooms: dict[str, str] = {}
+        self._rooms: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def set(self, sid: str, user: TicketUser, room: str = None) -> None:
+        with self._lock:
+            self._sessions[sid] = user
+            self._leave(sid)
+            if room is not None:
+                self._session_rooms[sid] = str(room)
+                self._rooms[str(room)] += 1
+
+    def pop(self, sid: str) -> TicketUser:
+        with self._lock:
+            self._leave(sid)
+            return self._sessions.pop(sid, None)
+
+    def get(self, sid: str) -> TicketUser:
+        with self._lock:
+            return self._sessions.get(sid)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def active_rooms(self, rooms: list) -> set:
+        """The rooms of `rooms` that have at least one session."""
+        with self._lock:
+            return {room for room in rooms if self._rooms.get(room, 0) > 0}
+
+    def _leave(self, sid: str) -> None:
+        room = self._session_rooms.pop(sid, None)
+        if room is not None:
+            self._rooms[room] -= 1
+            if self._rooms[room] <= 0:
+                del self._rooms[room]
+
+
+class RedisSessionStore:
+    """
+    Socket sessions shared by every web worker through a Redis hash keyed by socket id.
+    Room counts live in `<key>:rooms`, sessions of a worker that died keep their room
+    counted, which only costs frames nobody receives.
+    """
+    def __init__(self, redis_url: str, key: str = "socket_sessions") -> None:
+        import redis
+
+        self.redis = redis.Redis.from_url(redis_url)
+        self.key = key
+        self.rooms_key = f"{key}:rooms"
+        self.session_rooms_key = f"{key}:session_rooms"
+
+    def set(self, sid: str, user: TicketUser, room: str = None) -> None:
+        previous = self.redis.hget(self.session_rooms_key, sid)
+        pipeline = self.redis.pipeline()
+        pipeline.hset(self.key, sid, user.model_dump_json())
+        if previous is not None:
+            pipeline.hincrby(self.rooms_key, previous, -1)
+            pipeline.hdel(self.session_rooms_key, sid)
+        if room is not None:
+            pipeline.hset(self.session_rooms_key, sid, str(room))
+            pipeline.hincrby(self.rooms_key, str(room), 1)
+        pipeline.execute()
+
+    def pop(self, sid: str) -> TicketUser:
+        pipeline = self.redis.pipeline()
+        pipeline.hget(self.key, sid)
+        pipeline.hget(self.session_rooms_key, sid)
+        pipeline.hdel(self.key, sid)
+        pipeline.hdel(self.session_rooms_key, sid)
+        data, room, _, _ = pipeline.execute()
+        if room is not None:
+            self.redis.hincrby(self.rooms_key, room, -1)
+        return TicketUser.model_validate_json(data) if data else None
+
+    def get(self, sid: str) -> TicketUser:
+        data = self.redis.hget(self.key, sid)
+        return TicketUser.model_validate_json(data) if data else None
+
+    def count(self) -> int:
+        return self.redis.hlen(self.key)
+
+    def active_rooms(self, rooms: list) -> set:
+        counts = self.redis.hmget(self.rooms_key, rooms)
+        return {room for room, count in zip(rooms, counts) if count is not None and int(count) > 0}
+
+
+def create_session_store():
+    message_queue = os.getenv("SOCKETIO_MESSAGE_QUEUE")
+    if message_queue and message_queue.startswith(("redis://", "rediss://")):
+        return RedisSessionStore(message_queue)
+
+    return MemorySessionStore()
+
+
+def emitter_session_store():
+    """
+    The store the emitter skips empty rooms with, None to emit to every room.
+
+    With a message queue other than Redis the store only knows the sessions of this process,
+    gating on it would drop every event for clients connected to another one (e.g. all bot side emits).
+    """
+    if os.getenv("SOCKETIO_MESSAGE_QUEUE") and isinstance(session_store, MemorySessionStore):
+        return None
+    return session_store
+
+
+session_store = create_session_store()
+socket_sessions.set_function(session_store.count)
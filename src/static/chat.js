@@ -96,25 +96,33 @@ async function fetchTicket() {
 
 async function fetchMessages() {
   const channel_id = getChannelID();
+  let cursor = null;
   try {
-    const response = await fetch(`/api/v1/tickets/${channel_id}/messages`, {
-      headers: {
-        Authorization: getToken(),
-      },
-    });
+    do {
+      const params = new URLSearchParams({ limit: 100 });
+      if (cursor) params.set("after", cursor);
+
+      const response = await fetch(`/api/v1/tickets/${channel_id}/messages?${params}`, {
+        headers: {
+          Authorization: getToken(),
+        },
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        showToast(
+          `Error: ${errorData.message || "Failed to fetch messages"}`,
+          true
+        );
+        console.error("Failed to fetch messages:", errorData);
+        return;
+      }
 
-    if (response.ok) {
       const data = await response.json();
       console.log("Messages data:", data);
-      data.forEach(addMessage);
-    } else {
-      const errorData = await response.json();
-      showToast(
-        `Error: ${errorData.message || "Failed to fetch messages"}`,
-        true
-      );
-      console.error("Failed to fetch messages:", errorData);
-    }
+      data.messages.forEach(addMessage);
+      cursor = data.next_cursor;
+    } while (cursor);
   } catch (error) {
     showToast(`An unexpected error occurred: ${error.message}`, true);
     throw new Error(error);
@@ -66,27 +66,35 @@ async function createTicket(event) {
 }
 
 async function fetchChannels() {
-  try {
-    const response = await fetch(`/api/v1/tickets`, {
-      method: "GET",
-      headers: {
-        "Content-Type": "application/json",
-        Authorization: getToken(),
-        Accept: "application/json",
-      },
-    });
+  let cursor = null;
 
-    if (!response.ok) {
-      const errorData = await response.json();
-      console.error("Failed to fetch channels:", errorData);
-      throw new Error(errorData.message);
-    }
-
-    const data = await response.json();
+  try {
     const channels = document.getElementById("channels");
     channels.innerHTML = "";
 
-    data.forEach((ticket) => addChannel(ticket));
+    do {
+      const params = new URLSearchParams({ limit: 100 });
+      if (cursor) params.set("cursor", cursor);
+
+      const response = await fetch(`/api/v1/tickets?${params}`, {
+        method: "GET",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: getToken(),
+          Accept: "application/json",
+        },
+      });
+
+      if (!response.ok) {
+        const errorData = await response.json();
+        console.error("Failed to fetch channels:", errorData);
+        throw new Error(errorData.message);
+      }
+
+      const data = await response.json();
+      data.tickets.forEach((ticket) => addChannel(ticket));
+      cursor = data.next_cursor;
+    } while (cursor);
   } catch (error) {
     showToast("Failed to fetch channels:", error);
     throw error;
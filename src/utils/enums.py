@@ -22,4 +22,10 @@ class SupportRole(str, Enum):
     GENERAL = "GENERAL"
     TECHNICAL = "TECHNICAL"
     MANAGER = "MANAGER"
-    ADMIN = "ADMIN"
\ No newline at end of file
+    ADMIN = "ADMIN"
+
+
+class DeliveryStatus(str, Enum):
+    PENDING = "PENDING"
+    DELIVERED = "DELIVERED"
+    FAILED = "FAILED"
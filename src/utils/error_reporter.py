@@ -0,0 +1,236 @@
+from .webhook_client import webhook_client
+from .metrics import error_report_queue_depth
+
+import traceback
+import threading
+import hashlib
+import logging
+import atexit
+import time
+import os
+
+
+logger = logging.getLogger("webhook")
+
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+# Discord's limits for a single webhook message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARACTERS = 6000
+# Discord's limits for the parts of an embed, one part over them rejects the whole message
+MAX_TITLE_CHARACTERS = 256
+MAX_DESCRIPTION_CHARACTERS = 4096
+MAX_FIELD_NAME_CHARACTERS = 256
+MAX_FIELD_VALUE_CHARACTERS = 1024
+MAX_FOOTER_CHARACTERS = 2048
+
+TRUNCATED = "..... (truncated)"
+
+
+def fingerprint(*parts: str, trackback: str = "") -> str:
+    """
+    Identifies an error by `parts` and the frames of its traceback. The exception message
+    is left out, so the same failure with different ids or values is reported once.
+    """
+    frames = [line for line in trackback.splitlines() if line.startswith('  File "')]
+    return hashlib.sha1("\n".join([*parts, *frames]).encode()).hexdigest()
+
+
+def embed_size(embed: dict) -> int:
+    """Characters Discord counts towards `MAX_EMBED_CHARACTERS`."""
+    size = len(embed.get("title", "")) + len(embed.get("description", ""))
+    size += sum(len(field.get("name", "")) + len(field.get("value", "")) for field in embed.get("fields", []))
+    size += len(embed.get("footer", {}).get("text", ""))
+    return size
+
+
+def truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - len(TRUNCATED)] + TRUNCATED
+
+
+def fit_embed(embed: dict) -> dict:
+    """Truncates every part of `embed` to Discord's limit, so one report can't fail a whole batch."""
+    if "title" in embed:
+        embed["title"] = truncate(embed["title"], MAX_TITLE_CHARACTERS)
+    if "description" in embed:
+        embed["description"] = truncate(embed["description"], MAX_DESCRIPTION_CHARACTERS)
+    for field in embed.get("fields", []):
+        field["name"] = truncate(field.get("name", ""), MAX_FIELD_NAME_CHARACTERS)
+        field["value"] = truncate(field.get("value", ""), MAX_FIELD_VALUE_CHARACTERS)
+    if "text" in embed.get("footer", {}):
+        embed["footer"]["text"] = truncate(embed["footer"]["text"], MAX_FOOTER_CHARACTERS)
+    return embed
+
+
+class ErrorReporter:
+    """
+    Sends error embeds to Discord webhooks from a single background thread.
+
+    Reports are queued without blocking. Within `window` seconds an error is sent once,
+    repeats while it is queued raise its count and later repeats are summed into a
+    "x137 in last 60s" report when the window ends. Every `flush_interval` seconds the
+    queue is sent with up to 10 embeds per webhook call. At most `maxsize` reports are
+    queued, when full a report only gets in by replacing one of lower priority.
+    """
+    def __init__(self, maxsize: int = 200, window: float = 60, flush_interval: float = 2) -> None:
+        self.maxsize = maxsize
+        self.window = window
+        self.flush_interval = flush_interval
+
+        self._pending: dict[str, dict] = {}
+        self._seen: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: threading.Thread = None
+
+        self.dropped = 0
+        self.suppressed = 0
+        self.messages = 0
+
+
+    def report(self, url: str, embed: dict, key: str, priority: int = PRIORITY_NORMAL) -> None:
+        if not url:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending["count"] += 1
+                return
+
+            seen = self._seen.get(key)
+            if seen is not None and now - seen["reported_at"] < self.window:
+                seen["suppressed"] += 1
+                self.suppressed += 1
+                return
+
+            if len(self._pending) >= self.maxsize and not self._evict(priority):
+                self.dropped += 1
+                return
+
+            self._pending[key] = {"url": url, "embed": fit_embed(embed), "priority": priority, "count": 1}
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def queue_size(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue_size(),
+            "dropped": self.dropped,
+            "suppressed": self.suppressed,
+            "messages": self.messages,
+        }
+
+    def flush(self) -> None:
+        """Sends everything queued and the summaries of windows that ended."""
+        now = time.monotonic()
+        reports = []
+        with self._lock:
+            for key, report in self._pending.items():
+                if report["count"] > 1:
+                    title = f"{report['embed'].get('title', '')} (x{report['count']})"
+                    report["embed"]["title"] = truncate(title, MAX_TITLE_CHARACTERS)
+                reports.append(report)
+
+                # Its window ended since the last flush, send what it summed before starting a new one
+                previous = self._seen.get(key)
+                if previous is not None and previous["suppressed"]:
+                    reports.append(self._summary(previous, now))
+                self._seen[key] = {
+                    "url": report["url"],
+                    "title": report["embed"].get("title", ""),
+                    "priority": report["priority"],
+                    "reported_at": now,
+                    "suppressed": 0,
+                }
+            self._pending.clear()
+
+            for key, seen in list(self._seen.items()):
+                if now - seen["reported_at"] < self.window:
+                    continue
+                if not seen["suppressed"]:
+                    del self._seen[key]
+                    continue
+
+                reports.append(self._summary(seen, now))
+                seen["reported_at"] = now
+                seen["suppressed"] = 0
+
+        reports.sort(key=lambda report: report["priority"], reverse=True)
+        by_url: dict[str, list] = {}
+        for report in reports:
+            by_url.setdefault(report["url"], []).append(report["embed"])
+
+        for url, embeds in by_url.items():
+            for batch in self._pack(embeds):
+                self._send(url, batch)
+
+    def close(self) -> None:
+        self.flush()
+
+
+    def _evict(self, priority: int) -> bool:
+        key = min(self._pending, key=lambda key: self._pending[key]["priority"])
+        if self._pending[key]["priority"] >= priority:
+            return False
+
+        del self._pending[key]
+        self.dropped += 1
+        return True
+
+    def _summary(self, seen: dict, now: float) -> dict:
+        title = f"{seen['title']} (x{seen['suppressed']} in last {round(now - seen['reported_at'])}s)"
+        return {
+            "url": seen["url"],
+            "priority": seen["priority"],
+            "embed": {
+                "title": truncate(title, MAX_TITLE_CHARACTERS),
+                "description": "Repeated since it was last reported.",
+                "color": 0xFFA500,
+            },
+        }
+
+    def _pack(self, embeds: list):
+        """Splits embeds into webhook messages within Discord's count and size limits."""
+        batch, size = [], 0
+        for embed in embeds:
+            current = embed_size(embed)
+            if batch and (len(batch) == MAX_EMBEDS_PER_MESSAGE or size + current > MAX_EMBED_CHARACTERS):
+                yield batch
+                batch, size = [], 0
+            batch.append(embed)
+            size += current
+        if batch:
+            yield batch
+
+    def _send(self, url: str, embeds: list) -> None:
+        try:
+            response = webhook_client.execute(url, {"embeds": embeds})
+            self.messages += 1
+            if response.status_code >= 400:
+                logger.warning("Error report rejected by Discord: %s %s", response.status_code, response.text[:200])
+        except Exception:
+            logger.warning("Failed to send error report:\n%s", traceback.format_exc())
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Error reporter failed")
+
+
+error_reporter = ErrorReporter(
+    maxsize=int(os.getenv("ERROR_REPORT_QUEUE_SIZE", 200)),
+    window=float(os.getenv("ERROR_REPORT_WINDOW", 60)),
+    flush_interval=float(os.getenv("ERROR_REPORT_INTERVAL", 2))
+)
+error_report_queue_depth.set_function(error_reporter.queue_size)
+atexit.register(error_reporter.close)
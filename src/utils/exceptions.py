@@ -1,4 +1,5 @@
 import traceback
+import json
 from flask import jsonify
 from pydantic import ValidationError
 
@@ -25,14 +26,19 @@ class APIException(Exception):
             return traceback.format_exc()
             
             
-    def to_response(self):
-        """Convert the exception to a Flask response."""
-        response = {
+    def to_dict(self) -> dict:
+        return {
             "error": self.error_name.capitalize(),
             "message": self.message,
         }
-        
-        return jsonify(response), self.status_code
+
+    def headers(self) -> dict:
+        """Extra response headers."""
+        return {}
+
+    def to_response(self):
+        """Convert the exception to a Flask response."""
+        return jsonify(self.to_dict()), self.status_code, self.headers()
 
 
 class HandledApiException(APIException):
@@ -86,6 +92,15 @@ class NotfoundError(HandledApiException):
         super().__init__(error_name="NOT_FOUND", message=message, status_code=self.status_code, extra=extra)
 
 
+class BadRequestError(HandledApiException):
+    """Raised when the request is well formed but its values can not be used."""
+    def __init__(self, message: str | None=None, extra: dict=None) -> None:
+        self.message = message if message else "400 Bad Request"
+        self.status_code = 400
+
+        super().__init__(error_name="BAD_REQUEST", message=message, status_code=self.status_code, extra=extra)
+
+
 class ForbiddenError(HandledApiException):
     """Raised when the user is not authorised to access the resource."""
     def __init__(self, message: str | None=None, extra: dict=None) -> None:
@@ -93,3 +108,51 @@ class ForbiddenError(HandledApiException):
         self.status_code = 403
 
         super().__init__(error_name="FORBIDDEN", message=message, status_code=self.status_code, extra=extra)
+
+
+class ServiceUnavailableError(HandledApiException):
+    """Raised when the request can not be served by this process, `retry_after` seconds are sent as a hint."""
+    def __init__(self, message: str | None=None, extra: dict=None, retry_after: int=None) -> None:
+        self.message = message if message else "503 Service Unavailable"
+        self.status_code = 503
+        self.retry_after = retry_after
+
+        super().__init__(error_name="SERVICE_UNAVAILABLE", message=message, status_code=self.status_code, extra=extra)
+
+    def to_dict(self) -> dict:
+        data = super().to_dict()
+        if self.retry_after is not None:
+            data["retry_after"] = self.retry_after
+        return data
+
+    def headers(self) -> dict:
+        return {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+
+
+class RateLimitError(HandledApiException):
+    """Raised when the client exceeded a rate limit."""
+    def __init__(self, limit: str, extra: dict=None) -> None:
+        self.message = f"You are being ratelimited only {limit} request are allowed"
+        self.status_code = 429
+
+        super().__init__(error_name="ratelimit_exceeded", message=self.message, status_code=self.status_code, extra=extra)
+
+
+def format_validation_errors(e: ValidationError) -> list:
+    """Turns a pydantic `ValidationError` into the `errors` list of a BAD_REQUEST response."""
+    errors = []
+    
+    error_list = json.loads(e.json(include_url=False))
+
+    for error in error_list:
+        data = {
+            "location": '.'.join(map(str, error['loc'])), 
+            "message": error['msg'],
+            "type": error['type'],
+        }
+        if "ctx" in error:
+            data['context'] = error['ctx']
+
+        errors.append(data)
+
+    return errors
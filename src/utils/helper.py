@@ -1,6 +1,5 @@
 from snowflake import SnowflakeGenerator
-from discord_webhook import DiscordWebhook
-from discord import Embed, ApplicationContext
+from discord import Embed, ApplicationContext, Webhook, DiscordException
 
 from flask import request, Request
 
@@ -8,16 +7,30 @@ from flask_limiter.util import get_remote_address
 
 from typing import List, Optional, Union
 
+import aiohttp
+import asyncio
 import threading
+import logging
 import time
 import functools
 import os
 
+from .webhook_client import webhook_client
+from .exceptions import ServiceUnavailableError
+from .metrics import function_duration
+from .error_reporter import error_reporter, fingerprint, PRIORITY_NORMAL
+
+logger = logging.getLogger("webhook")
+
 gen = SnowflakeGenerator(0)
+_aiohttp_session: aiohttp.ClientSession = None
 
 ERROR_WEBHOOK_URL = os.getenv("ERROR_WEBHOOK_URL")
 ERROR_BOT_WEBHOOK_URL = os.getenv("ERROR_BOT_WEBHOOK_URL")
 
+# Short enough for several error embeds to fit in one webhook message
+TRACEBACK_LIMIT = 1800
+
 
 def generate_snowflake_id() -> str:
     return str(next(gen))
@@ -26,12 +39,16 @@ def generate_timestamp() -> int:
     return int(time.time())
 
 def calc_timing(func):
+    """Records the duration of every call in the `function_duration_seconds` histogram."""
+    histogram = function_duration.labels(f"{func.__module__}.{func.__name__}")
+
     @functools.wraps(func)
-    def wrapper(*args, kwargs):
-        start = time.time()
-        result = func(*args, kwargs)
-        print(f"Func {func.__name__} took {time.time() - start}s to complete")
-        return result
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
     return wrapper
 
 
@@ -68,15 +85,12 @@ def send_webhook_message(
         embeds_list = [embed] if embed else (embeds or [])
         embeds_data = [embed.to_dict() for embed in embeds_list]
 
-        # Create the webhook object
-        webhook = DiscordWebhook(url=url, content=content, rate_limit_retry=True)
-        for embed_data in embeds_data:
-            webhook.add_embed(embed_data)
+        payload = {"content": content, "embeds": embeds_data}
 
         try:
-            return webhook.execute().status_code in [200, 201, 203, 204]
+            return webhook_client.execute(url, payload).status_code in [200, 201, 203, 204]
         except Exception as e:
-            print(f"Error sending webhook message: {e}")
+            logger.warning("Error sending webhook message: %s", e)
             return False
 
 
@@ -102,11 +116,20 @@ def rate_limit_handler():
     
     
 
-def send_disord_error_log(ctx: ApplicationContext, error_type: str, trackback: str, error: Exception):
+def send_disord_error_log(
+    ctx: ApplicationContext,
+    error_type: str,
+    trackback: str,
+    error: Exception,
+    priority: int = PRIORITY_NORMAL
+):
+    """Reports a bot error through `error_reporter`, never blocks so it can be called on the bot loop."""
+    command = ctx.command.name if ctx and ctx.command else ""
+    key = fingerprint(error_type, error.__class__.__name__, command, trackback=trackback)
+
     trackback_len = len(trackback)
-    
-    if trackback_len > 4000:
-        trackback =  "..... (truncated)\n" + trackback[(trackback_len-4000):]
+    if trackback_len > TRACEBACK_LIMIT:
+        trackback =  "..... (truncated)\n" + trackback[(trackback_len-TRACEBACK_LIMIT):]
 
     embed = Embed(
         title=error_type, 
@@ -127,13 +150,38 @@ def send_disord_error_log(ctx: ApplicationContext, error_type: str, trackback: s
         inline=False
     )
 
-    send_webhook_message(url=ERROR_BOT_WEBHOOK_URL, embed=embed, run_as_thread=True)
-
-def send_error_log(error_type: str, trackback: str, error: Exception):
+    error_reporter.report(ERROR_BOT_WEBHOOK_URL, embed.to_dict(), key, priority)
+
+def flask_request_info() -> dict:
+    """Details of the current Flask request for `send_error_log`."""
+    return {
+        "path": request.path,
+        "method": request.method,
+        "args": request.args.to_dict(),
+        "body": request.data.decode("utf-8", errors="replace"),
+        "remote_addr": request.remote_addr,
+        "user_agent": request.headers.get("User-Agent"),
+    }
+
+
+def send_error_log(
+    error_type: str,
+    trackback: str,
+    error: Exception,
+    request_info: dict = None,
+    priority: int = PRIORITY_NORMAL
+):
+    """
+    Reports an API error through `error_reporter`, `request_info` defaults to
+    `flask_request_info()` and has to be passed when not running inside a Flask request.
+    """
+    if request_info is None:
+        request_info = flask_request_info()
+    key = fingerprint(error_type, error.__class__.__name__, request_info["path"], trackback=trackback)
 
     trackback_len = len(trackback)
-    if trackback_len > 4000:
-        trackback =  "..... (truncated)\n" + trackback[(trackback_len-4000):]
+    if trackback_len > TRACEBACK_LIMIT:
+        trackback =  "..... (truncated)\n" + trackback[(trackback_len-TRACEBACK_LIMIT):]
 
     embed = Embed(
         title=error_type, 
@@ -149,24 +197,41 @@ def send_error_log(error_type: str, trackback: str, error: Exception):
 
     embed.add_field(
     name="Request Info",
-    value=f"Path: ``{request.path}``\nMethod: ``{request.method}``\nQuery Params: ```py\n{request.args.to_dict()}```",
+    value=f"Path: ``{request_info['path']}``\nMethod: ``{request_info['method']}``\nQuery Params: ```py\n{request_info['args']}```",
     inline=False
 )   
-    request_body = request.data.decode("utf-8") if len(request.data) < 1000 else request.data.decode("utf-8")[:1000] + "..... (truncated)"
+    request_body = request_info["body"] if len(request_info["body"]) < 500 else request_info["body"][:500] + "..... (truncated)"
     embed.add_field(
         name="Request Body",
         value=f"```py\n{request_body}```",
     )
 
-    user_ip = request.remote_addr
-
     embed.add_field(
     name="User Info",
-    value=f"IP Address: ``{user_ip}``\nUser-Agent: ``{request.headers.get('User-Agent')}``",
+    value=f"IP Address: ``{request_info['remote_addr']}``\nUser-Agent: ``{request_info['user_agent']}``",
     inline=False
 )   
-    send_webhook_message(
-        url=ERROR_WEBHOOK_URL,
-        embed=embed,
-        run_as_thread=True
-    )
\ No newline at end of file
+    error_reporter.report(ERROR_WEBHOOK_URL, embed.to_dict(), key, priority)
+
+
+async def send_webhook_message_async(url: str, content: Optional[str] = None) -> bool:
+    """
+    Sends a message to a Discord webhook from the event loop, used by the ASGI server.
+
+    Rate limits are handled by `discord.Webhook`, connections are pooled in one shared session.
+    Raises `ServiceUnavailableError` when Discord can not be reached within the webhook timeout.
+    """
+    global _aiohttp_session
+    if _aiohttp_session is None or _aiohttp_session.closed:
+        _aiohttp_session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=webhook_client.timeout))
+
+    try:
+        webhook = Webhook.from_url(url, session=_aiohttp_session)
+        await webhook.send(content=content)
+        return True
+    except DiscordException as e:
+        logger.warning("Error sending webhook message: %s", e)
+        return False
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.warning("Discord unreachable while sending webhook message: %r", e)
+        raise ServiceUnavailableError(message="Discord could not be reached, try again later")
@@ -0,0 +1,28 @@
+from flask.json.provider import JSONProvider
+from pydantic import BaseModel
+
+import orjson
+
+
+def _default(obj):
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson, used by `jsonify` and `request.get_json`.
+    """
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Skip the bytes -> str -> bytes round trip of `dumps`
+        return self._app.response_class(orjson.dumps(obj, default=_default), mimetype=self.mimetype)
@@ -0,0 +1,132 @@
+from logging.handlers import QueueHandler, QueueListener
+from datetime import datetime, timezone
+
+import orjson
+import logging
+import atexit
+import random
+import queue
+import copy
+import sys
+import os
+
+
+# Attributes every LogRecord has, anything else on a record came in through `extra=`
+_RECORD_ATTRIBUTES = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime"}
+
+_listener: QueueListener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line with the time, level, logger, message and any `extra` fields.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                data[key] = value
+        if record.exc_text:
+            data["exc_info"] = record.exc_text
+
+        return orjson.dumps(data, default=str).decode()
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through a `rate` share of records below WARNING, warnings and errors always pass.
+    """
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without ever blocking the caller. When the queue
+    is full the record is dropped and counted.
+    """
+    _exception_formatter = logging.Formatter()
+
+    def __init__(self, log_queue: queue.Queue) -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge the arguments now, they may change before the listener formats the record.
+        # Tracebacks are rendered here since the frames are gone later, everything else on the listener.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self._exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _parse_pairs(value: str) -> dict:
+    """Parses `name=value,name=value` settings such as `LOG_LEVELS`."""
+    pairs = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, setting = item.split("=", 1)
+            pairs[name.strip()] = setting.strip()
+    return pairs
+
+
+def setup_logging() -> None:
+    """
+    Routes all logging through a bounded queue to a listener thread that writes to stdout.
+
+    Configured from the environment:
+        LOG_LEVEL: Root level, defaults to INFO.
+        LOG_LEVELS: Per logger levels, e.g. `bot.messages=DEBUG,socket=WARNING`.
+        LOG_SAMPLING: Share of sub-WARNING records kept per logger, e.g. `bot.messages=0.01`.
+        LOG_FORMAT: `json` (default) or `text`.
+        LOG_QUEUE_SIZE: Records buffered before new ones are dropped, defaults to 10000.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if os.getenv("LOG_FORMAT", "json").lower() == "text":
+        stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    else:
+        stream_handler.setFormatter(JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", 10000)))
+    root = logging.getLogger()
+    root.handlers = [DroppingQueueHandler(log_queue)]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    for name, level in _parse_pairs(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level.upper())
+    for name, rate in _parse_pairs(os.getenv("LOG_SAMPLING", "")).items():
+        logging.getLogger(name).addFilter(SamplingFilter(float(rate)))
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Writes out what is still queued, call before the process exits."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
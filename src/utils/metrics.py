@@ -0,0 +1,102 @@
+from prometheus_client import Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+
+from .exceptions import AuthenticationError
+
+import time
+import os
+
+
+# Process wide Prometheus metrics, served on `/metrics`. With several web workers every
+# process exposes its own values and has to be scraped separately.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time to produce a response, by route pattern",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+db_query_duration = Histogram(
+    "db_query_duration_seconds",
+    "Duration of data layer functions, cursors returned lazily are only counted until created",
+    ["query"],
+    buckets=LATENCY_BUCKETS
+)
+discord_request_duration = Histogram(
+    "discord_request_duration_seconds",
+    "Discord REST calls made by the bot, including rate limit waits",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+webhook_request_duration = Histogram(
+    "webhook_request_duration_seconds",
+    "Webhook executions sent by the shared webhook client",
+    ["status"],
+    buckets=LATENCY_BUCKETS
+)
+bot_coroutine_wait = Histogram(
+    "bot_coroutine_wait_seconds",
+    "Time callers wait for coroutines submitted to the bot loop, including the provisioning queue",
+    ["outcome"],
+    buckets=LATENCY_BUCKETS
+)
+function_duration = Histogram(
+    "function_duration_seconds",
+    "Functions wrapped with `calc_timing`",
+    ["function"],
+    buckets=LATENCY_BUCKETS
+)
+
+bot_provision_queued = Gauge("bot_provision_queued", "Coroutines waiting for a provisioning slot on the bot loop")
+bot_provision_in_flight = Gauge("bot_provision_in_flight", "Coroutines holding a provisioning slot on the bot loop")
+socket_emit_queue_depth = Gauge("socket_emit_queue_depth", "Socket events waiting in the emitter queue")
+webhook_queue_depth = Gauge("webhook_queue_depth", "Webhook executions waiting for their rate limit bucket")
+socket_connections = Gauge("socket_connections", "Open Socket.IO connections of this process")
+socket_sessions = Gauge("socket_sessions", "Authorized socket sessions in the session store")
+error_report_queue_depth = Gauge("error_report_queue_depth", "Error reports waiting to be sent to the error webhook")
+
+
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+
+def render_metrics(authorization: str = None) -> tuple:
+    """
+    Returns the `/metrics` body and content type. When `METRICS_TOKEN` is set the
+    scraper has to send it as `Authorization: Bearer <token>`.
+    """
+    if METRICS_TOKEN and authorization != f"Bearer {METRICS_TOKEN}":
+        raise AuthenticationError("Invalid metrics token")
+
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def observe_request(method: str, route: str, status: int, duration: float) -> None:
+    http_request_duration.labels(method, route, str(status)).observe(duration)
+
+
+def query_name(func) -> str:
+    """Label of a data layer function, e.g. `async_tickets.fetch_ticket`."""
+    return f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+
+def instrument_discord_http(http) -> None:
+    """
+    Times every REST call of a py-cord `HTTPClient` by route template, e.g. `/channels/{channel_id}`.
+    """
+    request = http.request
+
+    async def timed_request(route, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await request(route, **kwargs)
+            status = "ok"
+            return result
+        except Exception as e:
+            status = str(getattr(e, "status", "error"))
+            raise
+        finally:
+            discord_request_duration.labels(route.method, route.path, status).observe(time.perf_counter() - start)
+
+    http.request = timed_request
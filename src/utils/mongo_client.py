@@ -1,4 +1,4 @@
-from pymongo import MongoClient
+from pymongo import MongoClient, AsyncMongoClient
 import os
 
 class MongoDBConnection:
@@ -9,8 +9,38 @@ class MongoDBConnection:
     def get_database(self):
         return self.database
 
+
+class AsyncMongoDBConnection:
+    """
+    Asyncio MongoDB connection with its own pool, used by the Discord bot.
+
+    The client is created lazily on first use so it binds to the bot's event loop
+    rather than whichever thread imported this module.
+    """
+    def __init__(self, uri: str, db_name: str, max_pool_size: int = 100):
+        self.uri = uri
+        self.db_name = db_name
+        self.max_pool_size = max_pool_size
+        self.client = None
+        self.database = None
+
+    def get_database(self):
+        if self.database is None:
+            self.client = AsyncMongoClient(self.uri, maxPoolSize=self.max_pool_size)
+            self.database = self.client[self.db_name]
+        return self.database
+
+
 # Initialize the MongoDB connection when the module is imported
 mongo_connection = MongoDBConnection(os.getenv("MONGO_URI"), os.getenv("DB_NAME"))
+async_mongo_connection = AsyncMongoDBConnection(
+    os.getenv("MONGO_URI"),
+    os.getenv("DB_NAME"),
+    max_pool_size=int(os.getenv("MONGO_ASYNC_MAX_POOL_SIZE", 100))
+)
 
 def get_database():
-    return mongo_connection.get_database()
\ No newline at end of file
+    return mongo_connection.get_database()
+
+def get_async_database():
+    return async_mongo_connection.get_database()
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field, HttpUrl
-from typing import List, Optional
+from typing import List, Literal, Optional, Type, TypeVar
+from enum import Enum
 from .helper import generate_snowflake_id, generate_timestamp
-from .enums import UserRole, TicketStatus, SupportRole, IssueLevel
+from .enums import UserRole, TicketStatus, SupportRole, IssueLevel, DeliveryStatus
 
 # Database Schema
 class TicketUser(BaseModel):
@@ -49,8 +50,11 @@ class Message(BaseModel):
     author_name: str = Field(..., min_length=2, max_length=50, description="Username of the message sender")
     content: str = Field(..., description="Message content")
     attachments: List[str] = Field(default_factory=list, description="List of attachment URLs")
+    delivery_status: DeliveryStatus = Field(DeliveryStatus.DELIVERED, description="Delivery state of the message to Discord: PENDING, DELIVERED or FAILED")
     created_at: int = Field(default_factory=generate_timestamp, description="Message sent timestamp")
     updated_at: int = Field(default_factory=generate_timestamp, description="Message update timestamp")
+    version: int = Field(0, description="Per ticket change counter, set on every write to the message")
+    deleted: bool = Field(False, description="Tombstone of a deleted message, kept for incremental sync")
 
 
 
@@ -65,6 +69,27 @@ class UpdateTicketStatusRequest(BaseModel):
     status: TicketStatus = Field(..., description="New status for the ticket: ACTIVE, CLOSED or DELETED")
 
 
+class TicketListQuery(BaseModel):
+    status: Literal[TicketStatus.ACTIVE, TicketStatus.CLOSED] = Field(TicketStatus.ACTIVE, description="Only return tickets with this status")
+    issue_level: Optional[IssueLevel] = Field(None, description="Only return tickets with this issue level")
+    support_role: Optional[SupportRole] = Field(None, description="Only return tickets assigned to this support role")
+    cursor: Optional[str] = Field(None, pattern=r"^\d+:\d+$", description="`next_cursor` of the previous page")
+    limit: int = Field(50, ge=1, le=100, description="Maximum number of tickets to return")
+    count: bool = Field(False, description="Only return the number of matching tickets")
+
+
+class MessageHistoryQuery(BaseModel):
+    before: Optional[str] = Field(None, pattern=r"^\d+:\d+:[0-9a-f]{16}$", description="Return messages sent before this `next_cursor`")
+    after: Optional[str] = Field(None, pattern=r"^\d+:\d+:[0-9a-f]{16}$", description="Return messages sent after this `next_cursor`")
+    limit: int = Field(50, ge=1, le=100, description="Maximum number of messages to return")
+    sort: Literal["asc", "desc"] = Field("asc", description="Sort direction by creation time")
+
+
+class MessageSyncQuery(BaseModel):
+    since: str = Field("0", pattern=r"^\d+$", description="Token of the last sync, 0 for the full history")
+    limit: int = Field(100, ge=1, le=500, description="Maximum number of changes to return")
+
+
 class SendMessageRequest(BaseModel):
     content: str = Field(..., min_length=1, description="Message content")
     attachments: List[HttpUrl] = Field(default_factory=list, description="List of attachment URLs")
@@ -88,6 +113,7 @@ class TicketResponse(BaseModel):
 
 class TicketsResponse(BaseModel):
     tickets: List[TicketResponse]
+    next_cursor: Optional[str] = None
     
 
 class MessageResponse(BaseModel):
@@ -97,9 +123,58 @@ class MessageResponse(BaseModel):
     author_name: str
     content: str
     attachments: List[HttpUrl]
+    delivery_status: DeliveryStatus = DeliveryStatus.DELIVERED
     created_at: int
     updated_at: int
+    version: int = 0
 
 class MessagesResponse(BaseModel):
     messages: List[MessageResponse]
-    
+    next_cursor: Optional[str] = None
+
+class MessageSyncResponse(BaseModel):
+    messages: List[MessageResponse]
+    deleted: List[str]
+    next_token: str
+    has_more: bool
+
+
+
+# ============== Trusted Hydration ==============
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+_enum_fields: dict = {}
+
+def from_document(model: Type[ModelT], document: dict) -> ModelT:
+    """
+    Builds a model from a document of our own collections without validating it again.
+
+    Everything in the collections was validated before it was written, so only enum
+    fields are converted back from their stored values.
+    """
+    enum_fields = _enum_fields.get(model)
+    if enum_fields is None:
+        enum_fields = _enum_fields[model] = {
+            name: field.annotation
+            for name, field in model.model_fields.items()
+            if isinstance(field.annotation, type) and issubclass(field.annotation, Enum)
+        }
+
+    document.pop("_id", None)
+    for name, enum in enum_fields.items():
+        if name in document:
+            document[name] = enum(document[name])
+
+    return model.model_construct(**document)
+
+
+TICKET_RESPONSE_FIELDS = set(TicketResponse.model_fields)
+MESSAGE_RESPONSE_FIELDS = set(MessageResponse.model_fields)
+
+def ticket_response_data(ticket: Ticket) -> dict:
+    """`TicketResponse` data of a ticket without building a second model."""
+    return ticket.model_dump(include=TICKET_RESPONSE_FIELDS)
+
+def message_response_data(message: Message) -> dict:
+    """`MessageResponse` data of a message without building a second model."""
+    return message.model_dump(include=MESSAGE_RESPONSE_FIELDS)
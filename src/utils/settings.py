@@ -41,9 +41,10 @@ class GuildSettings:
 
 
 
-    def update_settings(self, data: dict) -> bool:
+    def update_settings(self, data: dict, reload: bool = True) -> bool:
         self.collection.update_one({"id": "guild_settings"}, {"$set": data})
-        self.load_settings()
+        if reload:
+            self.load_settings()
         return True
 
 
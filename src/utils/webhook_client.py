@@ -0,0 +1,164 @@
+from cachetools import LRUCache
+from requests.adapters import HTTPAdapter
+
+from .metrics import webhook_request_duration, webhook_queue_depth
+
+import requests
+import threading
+import time
+import os
+
+
+class RateLimitBucket:
+    """
+    Rate limit state of a single webhook, updated from Discord's `X-RateLimit-*` headers.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.remaining: int = None
+        self.reset_at: float = 0
+
+        self.waiting = 0
+        self.requests = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def delay(self) -> float:
+        """Seconds to wait before the next request can be sent without hitting a 429."""
+        if self.remaining == 0:
+            return max(0.0, self.reset_at - time.monotonic())
+        return 0.0
+
+    def update(self, headers) -> None:
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None:
+            self.remaining = int(remaining)
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + float(reset_after)
+
+    def record(self, latency: float) -> None:
+        self.requests += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "queue_depth": self.waiting,
+            "avg_latency": self.total_latency / self.requests if self.requests else 0.0,
+            "max_latency": self.max_latency,
+            "remaining": self.remaining,
+        }
+
+
+class WebhookClient:
+    """
+    Shared Discord webhook client with a keep-alive connection pool.
+
+    Requests to the same webhook are serialized through its `RateLimitBucket` and delayed
+    pre-emptively when Discord reports the bucket as exhausted, so 429s are the exception.
+    """
+    def __init__(self, pool_size: int = 20, timeout: float = 10, max_retries: int = 3, max_buckets: int = 4096) -> None:
+        self.timeout = timeout
+        self.max_retries = max_retries
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._buckets = LRUCache(maxsize=max_buckets)
+        self._buckets_lock = threading.Lock()
+
+
+    def execute(self, url: str, payload: dict) -> requests.Response:
+        """
+        Posts a webhook message, waiting out and retrying rate limits up to `max_retries` times.
+        """
+        bucket = self._get_bucket(url)
+
+        with self._buckets_lock:
+            bucket.waiting += 1
+        try:
+            bucket.lock.acquire()
+        finally:
+            with self._buckets_lock:
+                bucket.waiting -= 1
+
+        try:
+            for _ in range(self.max_retries + 1):
+                delay = bucket.delay()
+                if delay:
+                    time.sleep(delay)
+
+                start = time.monotonic()
+                try:
+                    response = self.session.post(url, json=payload, timeout=self.timeout)
+                except requests.RequestException:
+                    webhook_request_duration.labels("error").observe(time.monotonic() - start)
+                    raise
+                latency = time.monotonic() - start
+                bucket.record(latency)
+                webhook_request_duration.labels(str(response.status_code)).observe(latency)
+                bucket.update(response.headers)
+
+                if response.status_code != 429:
+                    return response
+
+                bucket.rate_limited += 1
+                time.sleep(self._retry_after(response))
+
+            return response
+        finally:
+            bucket.lock.release()
+
+    def queue_depth(self) -> int:
+        """Executions waiting for their bucket across all webhooks."""
+        with self._buckets_lock:
+            return sum(bucket.waiting for bucket in self._buckets.values())
+
+    def stats(self) -> dict:
+        """Per webhook id request count, latency, queue depth and rate limit state."""
+        with self._buckets_lock:
+            return {webhook_id: bucket.stats() for webhook_id, bucket in self._buckets.items()}
+
+
+    def _get_bucket(self, url: str) -> RateLimitBucket:
+        webhook_id = self._webhook_id(url)
+        with self._buckets_lock:
+            bucket = self._buckets.get(webhook_id)
+            if bucket is None:
+                bucket = self._buckets[webhook_id] = RateLimitBucket()
+            return bucket
+
+    @staticmethod
+    def _webhook_id(url: str) -> str:
+        # https://discord.com/api/webhooks/<id>/<token>, the token never ends up in stats
+        parts = url.split("?")[0].rstrip("/").split("/")
+        return parts[-2] if len(parts) >= 2 else url
+
+    @staticmethod
+    def _retry_after(response: requests.Response) -> float:
+        """Seconds to wait from the 429 body, or its `Retry-After` header when the body has none."""
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        value = body.get("retry_after") if isinstance(body, dict) else None
+        if value is None:
+            value = response.headers.get("Retry-After", 1)
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 1.0
+
+
+webhook_client = WebhookClient(
+    pool_size=int(os.getenv("WEBHOOK_POOL_SIZE", 20)),
+    timeout=float(os.getenv("WEBHOOK_TIMEOUT", 10))
+)
+webhook_queue_depth.set_function(webhook_client.queue_depth)
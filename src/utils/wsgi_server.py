@@ -0,0 +1,240 @@
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+import selectors
+import threading
+import socket
+import time
+import os
+
+
+SERVICE_UNAVAILABLE = b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+
+
+def is_websocket_upgrade(head: bytes) -> bool:
+    """Whether the start of a request asks for a websocket, checked before it is parsed."""
+    return b"\r\nupgrade: websocket" in head.lower()
+
+
+def asks_for_websocket(headers) -> bool:
+    return headers.get("Upgrade", "").lower() == "websocket"
+
+
+class PooledRequestHandler(WSGIRequestHandler):
+    """
+    HTTP/1.1 handler, a started request must be read and answered within the server's
+    `request_timeout`. Werkzeug answers every request with `Connection: close`, so a
+    connection carries a single request.
+    """
+    protocol_version = "HTTP/1.1"
+
+    # Upgrades are deferred to the server, which resumes them on the websocket pool
+    websocket = False
+    upgrade_pending = False
+
+    def handle_one_request(self) -> None:
+        self.connection.settimeout(self.server.request_timeout)
+        super().handle_one_request()
+
+    def run_wsgi(self) -> None:
+        # The server only peeks at the start of a request, the upgrade header may come later
+        if not self.websocket and asks_for_websocket(self.headers):
+            self.upgrade_pending = True
+            self.close_connection = True
+            return
+        super().run_wsgi()
+
+    def finish(self) -> None:
+        # The websocket pool still answers a pending upgrade
+        if not self.upgrade_pending:
+            super().finish()
+
+    def make_environ(self):
+        # Websockets stay open between pings, only plain requests get the request timeout
+        if asks_for_websocket(self.headers):
+            self.connection.settimeout(None)
+        return super().make_environ()
+
+    def log_request(self, code="-", size="-") -> None:
+        if self.server.access_log:
+            super().log_request(code, size)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server handling requests on a fixed pool of threads.
+
+    No monkey patching is involved, so the Discord bot keeps running its asyncio loop in
+    its own thread. New connections are watched by a single selector thread and only take
+    a worker once their request arrives, ones that send nothing are closed after
+    `first_byte_timeout` seconds. Websocket upgrades run on their own pool of
+    `websocket_workers` threads, as they hold one for their lifetime. At most `max_connections` connections and
+    `websocket_workers` websockets are open at once, further ones are answered with 503
+    and closed right away.
+    """
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        app,
+        workers: int = 64,
+        websocket_workers: int = 256,
+        max_connections: int = 1000,
+        backlog: int = 1024,
+        first_byte_timeout: float = 5,
+        request_timeout: float = 30,
+        access_log: bool = False
+    ) -> None:
+        self.request_queue_size = backlog
+        self.first_byte_timeout = first_byte_timeout
+        self.request_timeout = request_timeout
+        self.access_log = access_log
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wsgi")
+        self.websocket_executor = ThreadPoolExecutor(max_workers=websocket_workers, thread_name_prefix="wsgi-ws")
+        self.connections = threading.BoundedSemaphore(max_connections)
+        self.websockets = threading.BoundedSemaphore(websocket_workers)
+        self.rejected = 0
+
+        # Connections waiting for their request by socket, with client address and deadline
+        self._waiting: dict[socket.socket, tuple] = {}
+        self._waiting_lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_read, self._wakeup_write = socket.socketpair()
+        self._wakeup_write.setblocking(False)
+        self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+
+        super().__init__(host, port, app, handler=PooledRequestHandler)
+        threading.Thread(target=self._watch, name="wsgi-selector", daemon=True).start()
+
+    def process_request(self, request, client_address) -> None:
+        if not self.connections.acquire(blocking=False):
+            self._reject(request)
+            return
+
+        with self._waiting_lock:
+            self._waiting[request] = (client_address, time.monotonic() + self.first_byte_timeout)
+            self._selector.register(request, selectors.EVENT_READ)
+        try:
+            self._wakeup_write.send(b"\0")
+        except BlockingIOError:
+            # A wakeup is already pending
+            pass
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.websocket_executor.shutdown(wait=False, cancel_futures=True)
+
+
+    def _reject(self, request) -> None:
+        self.rejected += 1
+        try:
+            request.sendall(SERVICE_UNAVAILABLE)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+    def _close(self, request) -> None:
+        self.shutdown_request(request)
+        self.connections.release()
+
+    def _watch(self) -> None:
+        while True:
+            ready = self._selector.select(timeout=1)
+            now = time.monotonic()
+            dispatch, expired = [], []
+            with self._waiting_lock:
+                for key, _ in ready:
+                    if key.fileobj is self._wakeup_read:
+                        self._wakeup_read.recv(4096)
+                    elif key.fileobj in self._waiting:
+                        self._selector.unregister(key.fileobj)
+                        dispatch.append((key.fileobj, self._waiting.pop(key.fileobj)[0]))
+
+                for request, (_, deadline) in list(self._waiting.items()):
+                    if deadline <= now:
+                        self._selector.unregister(request)
+                        del self._waiting[request]
+                        expired.append(request)
+
+            for request in expired:
+                self._close(request)
+            for request, client_address in dispatch:
+                self._dispatch(request, client_address)
+
+    def finish_request(self, request, client_address) -> PooledRequestHandler:
+        return self.RequestHandlerClass(request, client_address, self)
+
+    def _dispatch(self, request, client_address) -> None:
+        """
+        Hands a connection whose request arrived to the request or the websocket pool. Upgrades
+        not seen in the peeked start of the request are moved over once their headers are parsed.
+        """
+        try:
+            head = request.recv(4096, socket.MSG_PEEK)
+        except OSError:
+            head = b""
+        if not head:
+            self._close(request)
+            return
+
+        if not is_websocket_upgrade(head):
+            self.executor.submit(self._process, request, client_address)
+        elif self.websockets.acquire(blocking=False):
+            self.websocket_executor.submit(self._process, request, client_address, True)
+        else:
+            self._reject(request)
+            self.connections.release()
+
+    def _process(self, request, client_address, websocket: bool = False) -> None:
+        handler = None
+        try:
+            handler = self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+
+        if handler is not None and handler.upgrade_pending:
+            # Handlers defer every upgrade, answer it here or move it to the websocket pool
+            if websocket:
+                self._resume(handler)
+            elif self.websockets.acquire(blocking=False):
+                self.websocket_executor.submit(self._resume, handler)
+            else:
+                self._reject(request)
+                self.connections.release()
+            return
+
+        if websocket:
+            self.websockets.release()
+        self._close(request)
+
+    def _resume(self, handler: PooledRequestHandler) -> None:
+        """Answers a websocket upgrade parsed by `handler`, runs on the websocket pool."""
+        try:
+            handler.websocket = True
+            handler.upgrade_pending = False
+            handler.run_wsgi()
+            handler.finish()
+        except Exception:
+            self.handle_error(handler.request, handler.client_address)
+        finally:
+            self.websockets.release()
+            self._close(handler.request)
+
+
+def create_server(app, host: str, port: int) -> PooledWSGIServer:
+    """
+    Builds the production server with the limits from the environment.
+    """
+    return PooledWSGIServer(
+        host,
+        port,
+        app,
+        workers=int(os.getenv("WEB_WORKERS", 64)),
+        websocket_workers=int(os.getenv("WEB_WEBSOCKET_WORKERS", 256)),
+        max_connections=int(os.getenv("WEB_MAX_CONNECTIONS", 1000)),
+        backlog=int(os.getenv("WEB_BACKLOG", 1024)),
+        first_byte_timeout=float(os.getenv("WEB_FIRST_BYTE_TIMEOUT", 5)),
+        request_timeout=float(os.getenv("WEB_REQUEST_TIMEOUT", 30)),
+        access_log=os.getenv("WEB_ACCESS_LOG", "false").lower() == "true"
+    )